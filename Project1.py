@@ -1,8 +1,19 @@
 import pandas as pd
 import os
 import re
+import sys
 from collections import defaultdict
-from itertools import combinations
+
+import profiling
+from closure import fd_fingerprint, shared_cache
+from data_export import project_tables, write_inserts
+from dataset_cache import load_relation
+from fd_cover import FDSet, applicable_fds, canonical_cover, synthesize_3nf
+from jd_search import JoinDependencySearch
+from key_discovery import KeyDiscovery, fd_candidate_keys, suggest_primary_key
+from mvd_check import mvd_holds
+from relation import as_relation
+from verification import format_report, verify_decomposition
 
 
 class FunctionalDependency:
@@ -50,6 +61,11 @@ def parse_fd_file(file_path):
         print(f"Error: File '{file_path}' not found.")
         return []
 
+def canonical_fds(fds):
+    # Canonical cover of the FDs (split, reduced, redundant ones dropped, merged per left side), MVDs kept as written
+    cover = [FunctionalDependency(determinants, dependents) for determinants, dependents in canonical_cover(fds)]
+    return FDSet(cover + [fd for fd in fds if fd.is_multivalued])
+
 def print_mvds(fds):
     print("Multivalued Dependencies:")
     for fd in fds:
@@ -69,32 +85,35 @@ def normalize_to_1nf(df, primary_keys):
    # Creates separate relations for multivalued attributes.
    # Returns a list of SQL queries and information about created tables.
     
+    relation = as_relation(df)
     tables_info = []
     queries = []
     base_table_name = "MainTable"
 
     # Create main table query
     main_table_query = f"CREATE TABLE {base_table_name} (\n"
-    for col in df.columns:
-        sql_type = 'VARCHAR(255)' if df[col].dtype == object else 'INT'
+    for col in relation.columns:
+        sql_type = relation.sql_type(col)
         main_table_query += f"  {col} {sql_type},\n"
     main_table_query += f"  PRIMARY KEY ({', '.join(primary_keys)})\n);"
     queries.append(("MainTable", main_table_query))
     tables_info.append({
         "name": base_table_name,
-        "columns": list(df.columns),
+        "columns": list(relation.columns),
         "primary_keys": primary_keys
     })
 
     # Handle multivalued attributes - create separate relations with all primary keys
-    for col in df.columns:
-        if df[col].dtype == object and df[col].str.contains(',').any():
+    # Multivalued values are detected once per distinct value, on the column dictionaries
+    # Key columns are never split (the same rule as flatten_1nf.py): the child table already holds them
+    for col in relation.columns:
+        if col not in primary_keys and relation.contains(col, ','):
             table_name = f"{col}_Table"
             query = f"CREATE TABLE {table_name} (\n"
             
             # Include all primary keys from base relation
             for pk in primary_keys:
-                sql_type = 'VARCHAR(255)' if df[pk].dtype == object else 'INT'
+                sql_type = relation.sql_type(pk)
                 query += f"  {pk} {sql_type},\n"
             
             # Add the multivalued attribute
@@ -108,7 +127,8 @@ def normalize_to_1nf(df, primary_keys):
             tables_info.append({
                 "name": table_name,
                 "columns": primary_keys + [col],
-                "primary_keys": all_keys
+                "primary_keys": all_keys,
+                "multivalued": col  # rows come from splitting this column (see flatten_1nf.py)
             })
 
     return queries, tables_info
@@ -120,14 +140,10 @@ def check_partial_dependencies(table_info, fds):
     primary_key_set = set(table_info["primary_keys"])
     decomposed_tables = {}
     
-    for fd in fds:
+    # Only FDs that affect this table (looked up in the FDSet index when there is one)
+    for fd in applicable_fds(fds, table_info["columns"]):
         if fd.is_multivalued:
             continue
-        
-        # Check if this FD affects this table
-        if not (fd.determinants.issubset(set(table_info["columns"])) and 
-                fd.dependents.issubset(set(table_info["columns"]))):
-            continue
             
         # Check if determinant is a proper subset of primary key
         if fd.determinants.issubset(primary_key_set) and fd.determinants != primary_key_set:
@@ -194,45 +210,48 @@ def generate_2nf_queries(tables_info, fds):
 
 def find_transitive_dependencies(table_info, fds):
     
-   # Find transitive dependencies in a table. A->B and B->C implies A->C is transitive if A is a key.
+   # Find transitive dependencies in a table: key -> X -> A, where X is not a key and A is non-prime.
+   # The table's FDs are compiled once into a dependency graph (the shared closure engine), so X being
+   # reachable from the key is one closure of the key and chains of any length are found.
+   # A is prime when it belongs to any candidate key of the table, not only to the primary key.
 
     transitive_deps = {}
     primary_key_set = set(table_info["primary_keys"])
     columns = set(table_info["columns"])
     
-    # Create a dependency graph
-    dep_graph = defaultdict(set)
-    for fd in fds:
-        if fd.is_multivalued:
-            continue
-        if not (fd.determinants.issubset(columns) and fd.dependents.issubset(columns)):
-            continue
-        for det in fd.determinants:
-            for dep in fd.dependents:
-                dep_graph[det].add(dep)
-    
-    # Find transitive dependencies
-    for fd1 in fds:
-        if fd1.is_multivalued:
-            continue
-        if not (fd1.determinants.issubset(columns) and fd1.dependents.issubset(columns)):
-            continue
-        
-        # Check if this FD starts from a non-key attribute
-        if not fd1.determinants.issubset(primary_key_set):
-            for fd2 in fds:
-                if fd2.is_multivalued:
-                    continue
-                if not (fd2.determinants.issubset(columns) and fd2.dependents.issubset(columns)):
-                    continue
-                
-                # If fd1: A->B and fd2: B->C, then we have a transitive dependency
-                if fd2.determinants.issubset(fd1.dependents):
-                    table_name = f"{table_info['name']}_Trans_{len(transitive_deps) + 1}"
-                    transitive_deps[table_name] = {
-                        'determinants': fd1.dependents,
-                        'dependents': fd2.dependents
-                    }
+    table_fds = [fd for fd in applicable_fds(fds, columns) if not fd.is_multivalued]
+    if not table_fds:
+        return transitive_deps
+    graph = shared_cache.engine(table_fds)
+    all_mask = graph.mask(columns, add=False)
+    reachable = graph.closure_mask(graph.mask(primary_key_set))
+    prime = primary_key_set.union(*fd_candidate_keys(table_info["columns"], table_fds))
+    is_superkey = {}  # determinant mask -> whether it determines the whole table
+    
+    # Group the transitively dependent attributes by the non-key determinant they go through
+    by_determinant = {}
+    for fd in table_fds:
+        if fd.determinants.issubset(primary_key_set):
+            continue  # key -> A directly (or a partial dependency, handled by 2NF)
+        det_mask = graph.mask(fd.determinants)
+        if det_mask & reachable != det_mask:
+            continue  # the key does not determine X, so there is no chain through it
+        if det_mask not in is_superkey:
+            # Stop the closure as soon as it covers the table
+            is_superkey[det_mask] = graph.closure_mask(det_mask, target=all_mask) & all_mask == all_mask
+        if is_superkey[det_mask]:
+            continue  # X is a superkey
+        dependents = fd.dependents - fd.determinants - prime
+        if dependents:
+            key = frozenset(fd.determinants)
+            by_determinant.setdefault(key, set()).update(dependents)
+    
+    for determinants, dependents in by_determinant.items():
+        table_name = f"{table_info['name']}_Trans_{len(transitive_deps) + 1}"
+        transitive_deps[table_name] = {
+            'determinants': set(determinants),
+            'dependents': dependents
+        }
     
     return transitive_deps
 
@@ -280,8 +299,9 @@ def generate_3nf_queries(tables_info, fds):
                     "primary_keys": list(table_info_3nf['determinants'])
                 })
             
-            # Create table with remaining attributes
-            remaining_attrs = set(table_info["columns"]) - used_attributes
+            # Create table with remaining attributes; determinants stay so the split tables join back
+            remaining_attrs = set(table_info["columns"]) - set().union(
+                *(table_info_3nf['dependents'] for table_info_3nf in transitive_deps.values()))
             if remaining_attrs:
                 remaining_table_name = f"{table_info['name']}_Base"
                 query = f"CREATE TABLE {remaining_table_name} (\n"
@@ -299,11 +319,65 @@ def generate_3nf_queries(tables_info, fds):
 
 
 
+def generate_3nf_synthesis_queries(tables_info, fds):
+    #Generate SQL queries for 3NF tables by Bernstein synthesis (see fd_cover.synthesize_3nf), built from 1NF tables.
+    #Each table is synthesized in one pass from the canonical cover of its FDs, so every FD is preserved.
+    queries = []
+    final_tables_info = []
+    
+    for table_info in tables_info:
+        schemas = synthesize_3nf(table_info["columns"], applicable_fds(fds, table_info["columns"]),
+                                 table_info["primary_keys"])
+        
+        if len(schemas) == 1 and set(schemas[0][0]) == set(table_info["columns"]):
+            # The table is its own synthesized schema
+            queries.append((table_info["name"], f"-- Table {table_info['name']} is already in 3NF\n" +
+                          f"CREATE TABLE {table_info['name']} (\n" +
+                          "\n".join(f"  {col} VARCHAR(255)," for col in table_info["columns"]) +
+                          f"\n  PRIMARY KEY ({', '.join(table_info['primary_keys'])})\n);"))
+            final_tables_info.append(table_info)
+            continue
+        
+        # Name each schema and index the tables by the first attribute of their primary key
+        synthesized = []
+        by_first_key = defaultdict(list)
+        for i, (columns, key) in enumerate(schemas, 1):
+            table_name = f"{table_info['name']}_3NF_{i}"
+            synthesized.append((table_name, columns, key))
+            by_first_key[key[0]].append((table_name, key))
+        
+        for table_name, columns, key in synthesized:
+            query = f"CREATE TABLE {table_name} (\n"
+            for col in columns:
+                query += f"  {col} VARCHAR(255),\n"
+            query += f"  PRIMARY KEY ({', '.join(key)})"
+            
+            # Foreign keys to the synthesized tables whose primary key lies inside this one
+            column_set = set(columns)
+            for col in columns:
+                for other_name, other_key in by_first_key.get(col, ()):
+                    if other_name != table_name and set(other_key) <= column_set and other_key != key:
+                        query += f",\n  FOREIGN KEY ({', '.join(other_key)}) " + \
+                                f"REFERENCES {other_name}({', '.join(other_key)})"
+            
+            query += "\n);"
+            queries.append((table_name, query))
+            final_tables_info.append({
+                "name": table_name,
+                "columns": columns,
+                "primary_keys": key
+            })
+    
+    return queries, final_tables_info
+
 def compute_closure(attributes, fds):
    #Compute the attribute closure for a given set of attributes under given FDs
+   #An FDSet carries its fingerprint, so its closures come from the shared cache. A plain list would have to be
+   #fingerprinted on every call, which costs more than closing it, so it is closed directly.
+    if isinstance(fds, FDSet):
+        return set(shared_cache.closure(attributes, fds))
     closure = set(attributes)
     changed = True
-    
     while changed:
         changed = False
         for fd in fds:
@@ -312,13 +386,12 @@ def compute_closure(attributes, fds):
                 if new_attrs:
                     closure.update(new_attrs)
                     changed = True
-                    
     return closure
 
-def is_superkey(attributes, all_attributes, fds):
-   
-    closure = compute_closure(attributes, fds)
-    return all_attributes.issubset(closure)
+def is_superkey(attributes, all_attributes, fds, fingerprint=None):
+    # Closures are memoized in the shared cache; pass a precomputed fingerprint when looping over FDs
+    profiling.count('is_superkey')
+    return shared_cache.is_superkey(attributes, all_attributes, fds, fingerprint)
 
 def find_bcnf_violations(table_info, fds):
    
@@ -326,17 +399,15 @@ def find_bcnf_violations(table_info, fds):
    
     violations = {}
     columns = set(table_info["columns"])
+    fingerprint = fd_fingerprint(fds)
     
-    for fd in fds:
+    # FDs that don't apply to this table are skipped by the index
+    for fd in applicable_fds(fds, columns):
         if fd.is_multivalued:
             continue
-            
-        # Skip FDs that don't apply to this table
-        if not (fd.determinants.issubset(columns) and fd.dependents.issubset(columns)):
-            continue
         
         # Check if determinant is a superkey
-        if not is_superkey(fd.determinants, columns, fds):
+        if not is_superkey(fd.determinants, columns, fds, fingerprint):
             # This is a BCNF violation
             table_name = f"{table_info['name']}_BCNF_{len(violations) + 1}"
             violations[table_name] = {
@@ -419,11 +490,13 @@ def generate_bcnf_queries(tables_info, fds):
 
  #  autonomously identify multi-valued dependencies WITHOUT relying on user-provided MVD data. 
 
-def validate_mvd(table_info, data_df, mvd):
+def validate_mvd(table_info, data_df, mvd, max_error=0.0):
    
    # Validate if an MVD X -->> Y holds in the data.
     # For X -->> Y, if two tuples agree on X, their Y values must be independent of Z (remaining attributes).
+    # max_error accepts an MVD whose violation ratio (share of missing Y x Z combinations) is at most that.
    
+    profiling.count('validate_mvd')
     if data_df.empty:
         return False
         
@@ -431,49 +504,29 @@ def validate_mvd(table_info, data_df, mvd):
     all_attrs = set(table_info["columns"])
     remaining_attrs = all_attrs - mvd.determinants - mvd.dependents
     
-    # Group by determinant values
-    determinant_cols = list(mvd.determinants)
-    grouped = data_df.groupby(determinant_cols)
-    
-    for _, group in grouped:
-        if len(group) <= 1:
-            continue
-            
-        # Get unique Y and Z values
-        y_values = set(tuple(row) for row in group[list(mvd.dependents)].values)
-        z_values = set(tuple(row) for row in group[list(remaining_attrs)].values)
-        
-        # For MVD to hold, all combinations of Y and Z values should exist
-        expected_count = len(y_values) * len(z_values)
-        actual_count = len(group)
-        
-        if actual_count != expected_count:
-            return False
-
-    
-    return True
+    # For MVD to hold, all combinations of Y and Z values should exist in every X group;
+    # the counts for all groups are computed in one vectorized pass
+    return mvd_holds(data_df, mvd.determinants, mvd.dependents, remaining_attrs, max_error)
 
-def find_4nf_violations(table_info, data_df, fds):
+def find_4nf_violations(table_info, data_df, fds, max_error=0.0):
     
     #Find 4NF violations in a table.
   
     violations = {}
     columns = set(table_info["columns"])
+    fingerprint = fd_fingerprint(fds)
     
-    for fd in fds:
+    # MVDs that don't apply to this table are skipped by the index
+    for fd in applicable_fds(fds, columns):
         if not fd.is_multivalued:
             continue
             
-        # Skip MVDs that don't apply to this table
-        if not (fd.determinants.issubset(columns) and fd.dependents.issubset(columns)):
-            continue
-            
         # Validate MVD against actual data
-        if not validate_mvd(table_info, data_df, fd):
+        if not validate_mvd(table_info, data_df, fd, max_error):
             continue
         
         # Check if determinant is a superkey
-        if not is_superkey(fd.determinants, columns, fds):
+        if not is_superkey(fd.determinants, columns, fds, fingerprint):
             # Check if dependent is not a subset of determinant (non-trivial)
             if not fd.dependents.issubset(fd.determinants):
                 # This is a 4NF violation
@@ -485,7 +538,7 @@ def find_4nf_violations(table_info, data_df, fds):
     
     return violations
 
-def generate_4nf_queries(tables_info, fds, data_df):
+def generate_4nf_queries(tables_info, fds, data_df, max_error=0.0):
     
    # Generate SQL queries for 4NF tables based on BCNF tables.
   
@@ -494,7 +547,7 @@ def generate_4nf_queries(tables_info, fds, data_df):
     final_tables_info = []
     
     for table_info in tables_info:
-        mvd_violations = find_4nf_violations(table_info, data_df, fds)
+        mvd_violations = find_4nf_violations(table_info, data_df, fds, max_error)
         
 
         
@@ -561,68 +614,24 @@ def generate_4nf_queries(tables_info, fds, data_df):
     
     return queries, final_tables_info
 
-def is_lossless_join(table_info, decomposition, data_df):
-   
-    # Check if a decomposition has lossless join property.
-    
-   
-    if not decomposition:
-        return False
-        
-    # Project the data into decomposed relations
-    projected_dfs = []
-    for rel_attrs in decomposition:
-        proj_df = data_df[list(rel_attrs)].drop_duplicates()
-        projected_dfs.append(proj_df)
-    
-    # Perform natural join of all projections
-    result_df = projected_dfs[0]
-    for df in projected_dfs[1:]:
-        common_cols = list(set(result_df.columns) & set(df.columns))
-        if not common_cols:  # No common attributes for natural join
-            return False
-        result_df = result_df.merge(df, on=common_cols, how='inner')
-    
-    # Compare with original relation
-    original_df = data_df[list(set().union(*decomposition))].drop_duplicates()
-    return len(result_df) == len(original_df)
-
-def find_join_dependencies(table_info, data_df):
+def find_join_dependencies(table_info, data_df, fds=None, workers=None, max_candidates=5000, time_limit=None):
    
     #Find join dependencies in a table that violate 5NF.
     #A join dependency exists when a table can be losslessly decomposed into smaller projections.
+    #The search is pruned, parallel and bounded by max_candidates / time_limit (see jd_search.py).
     
-   
     join_deps = {}
-    columns = set(table_info["columns"])
-    n = len(columns)
-    
-    # Check all possible decompositions into 3 or more projections
-    # Starting with smallest projections first
-    for size in range(2, n-1):
-        for proj1 in combinations(columns, size):
-            proj1 = set(proj1)
-            remaining = columns - proj1
-            
-            for size2 in range(2, len(remaining)):
-                for proj2 in combinations(remaining, size2):
-                    proj2 = set(proj2)
-                    proj3 = remaining - proj2
-                    
-                    if len(proj3) < 2:  # Each projection should have at least 2 attributes
-                        continue
-                    
-                    decomposition = [proj1, proj2, proj3]
-                    
-                    # Check if this decomposition is lossless
-                    if is_lossless_join(table_info, decomposition, data_df):
-                        # Found a join dependency
-                        table_name = f"{table_info['name']}_5NF_{len(join_deps) + 1}"
-                        join_deps[table_name] = decomposition
+    search = JoinDependencySearch(data_df, table_info["columns"], fds, workers=workers,
+                                  max_candidates=max_candidates, time_limit=time_limit)
+    for decomposition in search.search():
+        table_name = f"{table_info['name']}_5NF_{len(join_deps) + 1}"
+        join_deps[table_name] = decomposition
+    profiling.count('jd_candidates_tested', search.stats['tested'])
+    profiling.count('jd_candidates_pruned', search.stats['pruned'])
     
     return join_deps
 
-def generate_5nf_queries(tables_info, fds, data_df):
+def generate_5nf_queries(tables_info, fds, data_df, workers=None):
     
     
     # Generate SQL queries for 5NF tables based on 4NF tables.
@@ -636,7 +645,7 @@ def generate_5nf_queries(tables_info, fds, data_df):
     final_tables_info = []
     
     for table_info in tables_info:
-        join_deps = find_join_dependencies(table_info, data_df)
+        join_deps = find_join_dependencies(table_info, data_df, fds, workers=workers)
         
         if not join_deps:
             # If no join dependencies found, table is already in 5NF
@@ -684,18 +693,191 @@ def generate_5nf_queries(tables_info, fds, data_df):
     
     return queries, final_tables_info
 
+# Normal forms in the order they are reached; each stage is built from the tables of the one before it.
+NORMAL_FORMS = ['1NF', '2NF', '3NF', 'BCNF', '4NF', '5NF']
+
+STAGE_GRAPH = {
+    '1NF': None,
+    '2NF': '1NF',
+    '3NF': '2NF',
+    'BCNF': '3NF',
+    '4NF': 'BCNF',
+    '5NF': '4NF',
+}
+
+def resolve_target(target):
+    # Accepts a menu number (1-6) or a normal form name such as '3NF' or 'bcnf'.
+    if isinstance(target, int):
+        if target < 1 or target > len(NORMAL_FORMS):
+            raise ValueError("Invalid choice. Please select a number between 1 and 6.")
+        return NORMAL_FORMS[target - 1]
+    name = str(target).strip().upper()
+    if name not in STAGE_GRAPH:
+        raise ValueError(f"Unknown normal form '{target}'. Expected one of {', '.join(NORMAL_FORMS)}.")
+    return name
+
+class NormalizationPipeline:
+    # Runs only the stages needed for a requested normal form and caches each stage's output,
+    # so asking for 3NF never pays for MVD validation or the join dependency search.
+
+    def __init__(self, df, fds, primary_keys, workers=None, minimize=False, synthesis=False, max_error=0.0):
+        self.df = as_relation(df)
+        # minimize replaces the FDs by their canonical cover; either way they are indexed once for every stage
+        self.fds = canonical_fds(fds) if minimize else FDSet(fds)
+        self.primary_keys = primary_keys
+        self.workers = workers
+        self.results = {}
+        # Synthesis builds 3NF straight from the 1NF tables, skipping the 2NF split
+        self.parents = dict(STAGE_GRAPH, **({'3NF': '1NF'} if synthesis else {}))
+        self.stages = {
+            '2NF': lambda tables_info: generate_2nf_queries(tables_info, self.fds),
+            '3NF': lambda tables_info: (generate_3nf_synthesis_queries if synthesis else
+                                        generate_3nf_queries)(tables_info, self.fds),
+            'BCNF': lambda tables_info: generate_bcnf_queries(tables_info, self.fds),
+            '4NF': lambda tables_info: generate_4nf_queries(tables_info, self.fds, self.df, max_error),
+            '5NF': lambda tables_info: generate_5nf_queries(tables_info, self.fds, self.df, self.workers),
+        }
+
+    def run(self, target):
+        # Returns (queries, tables_info) for the target stage, running missing parent stages first.
+        target = resolve_target(target)
+
+        # Walk up the stage graph until we hit a cached stage or the 1NF root
+        pending = []
+        stage = target
+        while stage is not None and stage not in self.results:
+            pending.append(stage)
+            stage = self.parents[stage]
+
+        for stage in reversed(pending):
+            parent = self.parents[stage]
+            with profiling.span(stage):
+                if parent is None:
+                    self.results[stage] = normalize_to_1nf(self.df, self.primary_keys)
+                else:
+                    _, parent_tables = self.results[parent]
+                    self.results[stage] = self.stages[stage](parent_tables)
+
+        return self.results[target]
+
+    def verify(self, target):
+        # Dependency preservation and lossless join report for the target stage (see verification.py)
+        _, tables_info = self.run(target)
+        with profiling.span('verify'):
+            return verify_decomposition(tables_info, self.fds, self.df)
+
+def classify(df, fds, primary_keys=None, workers=1, max_candidates=5000, time_limit=None, max_error=0.0):
+    #Return the highest normal form ('1NF' to '5NF') the table is already in, or None when it is not even in 1NF.
+    #The conditions of each stage are tested in order on the table as a whole and the first failure ends the
+    #check, so a table failing 2NF never pays for MVD validation or the join dependency search. Closures come
+    #from the shared cache and the data is encoded once, so checking many tables stays cheap.
+    #Without primary_keys the key is detected from the FDs and the data; max_candidates / time_limit bound 5NF.
+    #max_error is the MVD violation ratio still accepted when the MVDs are checked on the data (4NF).
+    relation = as_relation(df)
+    fds = fds if isinstance(fds, FDSet) else FDSet(fds)
+    if primary_keys is None:
+        primary_keys = suggest_primary_key(relation, fds)
+        if not primary_keys:
+            return None
+    table_info = {"name": "Table", "columns": list(relation.columns), "primary_keys": list(primary_keys)}
+    
+    with profiling.span('classify'):
+        if any(relation.contains(col, ',') for col in relation.columns):
+            return None
+        if check_partial_dependencies(table_info, fds):
+            return '1NF'
+        if find_transitive_dependencies(table_info, fds):
+            return '2NF'
+        if find_bcnf_violations(table_info, fds):
+            return '3NF'
+        if find_4nf_violations(table_info, relation, fds, max_error):
+            return 'BCNF'
+        search = JoinDependencySearch(relation, table_info["columns"], fds, workers=workers,
+                                      max_candidates=max_candidates, time_limit=time_limit,
+                                      stop_at_first=True)
+        if search.search():
+            return '4NF'
+        return '5NF'
+
+def normalize(df, fds, primary_keys, target, workers=None, minimize=False, synthesis=False, max_error=0.0):
+    #Normalize df up to the target normal form and return (queries, tables_info) for that stage.
+    #workers bounds the process pool of the 5NF join dependency search (1 runs it in-process).
+    #minimize normalizes with the canonical cover of the FDs instead of the FDs as written.
+    #synthesis builds 3NF by Bernstein synthesis, which preserves every FD, instead of decomposition.
+    #max_error lets 4NF accept MVDs that hold on all but that share of their Y x Z combinations (noisy data).
+    return NormalizationPipeline(df, fds, primary_keys, workers, minimize, synthesis, max_error).run(target)
+
 def main():
+    # python Project1.py [--profile [trace.json]] records per-stage spans and prints a summary at the end
+    # python Project1.py --minimize normalizes with the canonical cover of FunctionalDependencies.txt
+    # python Project1.py --synthesis builds 3NF by Bernstein synthesis (every FD preserved)
+    # python Project1.py --classify only reports the highest normal form MainData.csv is already in
+    # python Project1.py --max-error 0.05 accepts MVDs missing up to 5% of their combinations in the data
+    # python Project1.py --data also writes the rows of every table into Output.sql as INSERTs
+    args = sys.argv[1:]
+    minimize = '--minimize' in args
+    synthesis = '--synthesis' in args
+    classify_only = '--classify' in args
+    include_data = '--data' in args
+    max_error = 0.0
+    if '--max-error' in args:
+        position = args.index('--max-error')
+        try:
+            max_error = float(args[position + 1])
+        except (IndexError, ValueError):
+            print("Usage: python Project1.py --max-error <violation ratio, eg 0.05>")
+            sys.exit(1)
+    if '--profile' not in args:
+        run_interactive(minimize, synthesis, classify_only, max_error, include_data)
+        return
+
+    position = args.index('--profile')
+    trace_path = args[position + 1] if position + 1 < len(args) and not args[position + 1].startswith('--') \
+        else 'profile_trace.json'
+    with profiling.profile() as profiler:
+        try:
+            run_interactive(minimize, synthesis, classify_only, max_error, include_data)
+        finally:
+            profiler.write_json(trace_path)
+            print(f"\n{profiler.summary()}")
+            print(f"Profile trace saved to {trace_path}.")
+
+def run_interactive(minimize=False, synthesis=False, classify_only=False, max_error=0.0, include_data=False):
     # Input: CSV file path and primary keys
-    primary_keys = input("Enter the primary keys (comma-separated): ").strip().split(',')
+    # Leaving the keys blank detects them from the FDs and the data (see key_discovery.py)
+    keys_input = input("Enter the primary keys (comma-separated, blank to detect): ").strip()
+    primary_keys = [key.strip() for key in keys_input.split(',')] if keys_input else None
 
     # Read functional dependencies
     print("\nReading functional dependencies...")
-    fds = parse_fd_file('FunctionalDependencies.txt')
+    with profiling.span('read_fds'):
+        fds = parse_fd_file('FunctionalDependencies.txt')
 
-    # Read CSV
+    # Read CSV once into dictionary-encoded columns shared by every stage (cached on disk between runs)
     print("\nReading CSV file...")
-    df = pd.read_csv('MainData.csv')
-    if df is None:
+    try:
+        with profiling.span('read_csv'):
+            df = load_relation('MainData.csv')
+    except FileNotFoundError:
+        print("Error: File 'MainData.csv' not found.")
+        return
+
+    if primary_keys is None:
+        with profiling.span('detect_keys'):
+            primary_keys = suggest_primary_key(df, fds)
+        if not primary_keys:
+            print("Error: no candidate key found in the data.")
+            return
+        print(f"\nDetected primary keys: {', '.join(primary_keys)}")
+    elif not set(primary_keys).issubset(df.columns):
+        print(f"Error: unknown key columns {', '.join(sorted(set(primary_keys) - set(df.columns)))}.")
+        return
+    elif not KeyDiscovery(df, allow_nulls=True).is_unique(primary_keys):
+        print(f"\nWarning: rows repeat values of {', '.join(primary_keys)}; it is not a key of the data.")
+
+    if classify_only:
+        highest = classify(df, canonical_fds(fds) if minimize else fds, primary_keys, max_error=max_error)
+        print(f"\nHighest normal form: {highest or 'not in 1NF (multivalued attributes)'}")
         return
 
     # User chooses the highest normal form
@@ -715,67 +897,47 @@ def main():
         print(f"Error: {e}")
         return
 
+    target = NORMAL_FORMS[target_nf - 1]
+    pipeline = NormalizationPipeline(df, fds, primary_keys, minimize=minimize, synthesis=synthesis,
+                                     max_error=max_error)
+    queries, tables_info = pipeline.run(target)
 
+    if target == '4NF':
+        print_mvds(fds)
+    print(f"\n-- Tables in {target} --")
+    # Output.sql holds only the schema unless the rows were asked for (--data)
+    with profiling.span('save_output'):
+        if include_data:
+            save_queries_to_file(queries, "Output.sql", df, tables_info)
+        else:
+            save_queries_to_file(queries, "Output.sql")
+    for table_name, query in queries:
+        print(f"\n{query}")
 
+    print(f"\n-- Verification --\n{format_report(pipeline.verify(target))}")
 
-    queries_1nf, tables_info_1nf = normalize_to_1nf(df, primary_keys)
-    queries_2nf, tables_info_2nf = generate_2nf_queries(tables_info_1nf, fds)
-    queries_3nf, tables_info_3nf = generate_3nf_queries(tables_info_2nf, fds)
-    queries_bcnf, tables_info_bcnf = generate_bcnf_queries(tables_info_3nf, fds)
-    queries_4nf, final_tables = generate_4nf_queries(tables_info_bcnf, fds,df)
-    queries_5nf, final_tables_5nf = generate_5nf_queries(final_tables, fds,df)
-
-    # Step 1: Generate 1NF queries and get table information
-    if target_nf == 1:
-        print("\n-- Tables in 1NF --")
-        save_queries_to_file(queries_1nf, "Output.sql")
-        for table_name, query in queries_1nf:
-            print(f"\n{query}")
-
-    # Step 2: Generate 2NF queries based on 1NF tables
-    if target_nf == 2:
-        print("\n-- Tables in 2NF --")
-        save_queries_to_file(queries_2nf, "Output.sql")
-        for table_name, query in queries_2nf:
-            print(f"\n{query}")
-
-    # Step 3: Generate 3NF queries based on 2NF tables
-    if target_nf == 3:
-        print("\n-- Tables in 3NF --")
-        save_queries_to_file(queries_3nf, "Output.sql")
-        for table_name, query in queries_3nf:
-            print(f"\n{query}")
-
-    # Step 4: Generate BCNF queries based on 3NF tables
-    if target_nf == 4:
-        print("\n-- Tables in BCNF --")
-        save_queries_to_file(queries_bcnf, "Output.sql")
-        for table_name, query in queries_bcnf:
-            print(f"\n{query}")
-    if target_nf ==5:
-    # Step 5: Generate 4NF queries based on BCNF tables
-        print_mvds(fds)
-        print("\n-- Tables in 4NF --")
-        save_queries_to_file(queries_4nf, "Output.sql")
-        for table_name, query in queries_4nf:
-            print(f"\n{query}")
-    # Step 6: Generate 5NF queries based on 4NF tables
-    if target_nf == 6:
-       print("\n-- Tables in 5NF --")
-       save_queries_to_file(queries_5nf, "Output.sql")
-       for table_name, query in queries_5nf:
-            print(f"\n{query}")
 
+def write_queries(file, queries):
+    """Writes the (table_name, query) pairs to an open SQL file."""
+    for table_name, query in queries:
+        file.write(f"-- Query for {table_name}\n")
+        file.write(f"{query};\n\n")
 
+def save_queries_to_file(queries, filename, data=None, tables_info=None, batch_size=500):
+    """Saves the provided queries to a specified SQL file.
 
-def save_queries_to_file(queries, filename):
-    """Saves the provided queries to a specified SQL file."""
+    When data and tables_info are given, the data is projected onto every table
+    and written after the queries as multi-row INSERT batches (see data_export.py).
+    Returns the number of rows written per table.
+    """
     try:
         with open(filename, 'w') as file:
-            for table_name, query in queries:
-                file.write(f"-- Query for {table_name}\n")
-                file.write(f"{query};\n\n")
+            write_queries(file, queries)
+            counts = {}
+            if data is not None and tables_info is not None:
+                counts = write_inserts(file, project_tables(data, tables_info), batch_size)
         print(f"Queries saved to {filename}.")
+        return counts
     except Exception as e:
         print(f"Error saving queries to file: {e}")
 
@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Project1 import NormalizationPipeline, parse_fd_file, resolve_target, write_queries
+from data_export import project_tables, write_inserts
+from dataset_cache import load_relation
+from key_discovery import suggest_primary_key
+
+
+def read_manifest(manifest_path):
+    """Read a batch manifest: a JSON list of jobs, or an object with a "jobs" list.
+
+    Each job names a CSV file, an FD file and the target normal form (a name
+    such as "3NF" or a menu number 1-6). Optional keys: "keys" (a list or a
+    comma-separated string; detected from the FDs and the data when missing),
+    "name" (defaults to the CSV's base name), "data" (also write INSERT
+    batches for the table rows), "minimize" (normalize with the canonical
+    cover of the FDs), "synthesis" (build 3NF by Bernstein synthesis) and
+    "max_error" (largest MVD violation ratio accepted in the data, default 0).
+    Relative paths are resolved against the manifest's directory.
+    """
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    jobs = manifest["jobs"] if isinstance(manifest, dict) else manifest
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    resolved = []
+    names = set()
+    for i, job in enumerate(jobs, 1):
+        for field in ('csv', 'fds', 'target'):
+            if field not in job:
+                raise ValueError(f"Job {i} in {manifest_path} has no '{field}'.")
+        keys = job.get('keys')
+        if isinstance(keys, str):
+            keys = keys.split(',')
+
+        name = job.get('name') or os.path.splitext(os.path.basename(job['csv']))[0]
+        unique_name, suffix = name, 2
+        while unique_name in names:
+            unique_name = f"{name}_{suffix}"
+            suffix += 1
+        names.add(unique_name)
+
+        resolved.append({
+            'name': unique_name,
+            'csv': os.path.join(base_dir, job['csv']),
+            'fds': os.path.join(base_dir, job['fds']),
+            'keys': [key.strip() for key in keys] if keys else None,
+            'target': resolve_target(job['target']),
+            'data': bool(job.get('data', False)),
+            'minimize': bool(job.get('minimize', False)),
+            'synthesis': bool(job.get('synthesis', False)),
+            'max_error': float(job.get('max_error', 0.0)),
+        })
+    return resolved
+
+
+def run_job(job, output_dir):
+    """Normalize one relation and write <name>.sql and <name>.json (with its verification report) to output_dir."""
+    started = time.perf_counter()
+    result = {'name': job['name'], 'csv': job['csv'], 'target': job['target'], 'status': 'ok'}
+    try:
+        if not os.path.exists(job['fds']):
+            raise FileNotFoundError(f"File '{job['fds']}' not found.")
+        relation = load_relation(job['csv'])
+        fds = parse_fd_file(job['fds'])
+        keys = job['keys'] or suggest_primary_key(relation, fds)
+        if not keys:
+            raise ValueError("No candidate key found in the data.")
+        result['keys'] = keys
+        # Jobs already run in parallel, so each one searches join dependencies in-process
+        pipeline = NormalizationPipeline(relation, fds, keys, workers=1,
+                                         minimize=job['minimize'], synthesis=job['synthesis'],
+                                         max_error=job['max_error'])
+        queries, tables_info = pipeline.run(job['target'])
+
+        sql_path = os.path.join(output_dir, f"{job['name']}.sql")
+        with open(sql_path, 'w') as file:
+            write_queries(file, queries)
+            if job['data']:
+                result['rows'] = write_inserts(file, project_tables(relation, tables_info, workers=1))
+        result['sql'] = sql_path
+        result['tables'] = [{'name': table['name'],
+                             'columns': list(table['columns']),
+                             'primary_keys': list(table['primary_keys'])} for table in tables_info]
+        report = pipeline.verify(job['target'])
+        result['verification'] = {
+            'lost_fds': [{'determinants': sorted(determinants), 'dependents': sorted(dependents)}
+                         for determinants, dependents in report['lost_fds']],
+            'lossless': report['lossless'],
+            'lossless_by': report['lossless_by'],
+        }
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = round(time.perf_counter() - started, 6)
+
+    with open(os.path.join(output_dir, f"{job['name']}.json"), 'w') as file:
+        json.dump(result, file, indent=2)
+    return result
+
+
+def run_batch(jobs, output_dir, workers=None):
+    """Run the jobs on a process pool and return their results in manifest order.
+
+    A failing job is recorded with status "error" and does not stop the others.
+    A summary of all jobs is written to output_dir/summary.json.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    if workers == 1 or len(jobs) < 2:
+        for job in jobs:
+            results[job['name']] = run_job(job, output_dir)
+            _report(results[job['name']], len(results), len(jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_job, job, output_dir): job for job in jobs}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result['name']] = result
+                _report(result, len(results), len(jobs))
+
+    ordered = [results[job['name']] for job in jobs]
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as file:
+        json.dump(ordered, file, indent=2)
+    return ordered
+
+
+def _report(result, done, total):
+    detail = f"{len(result['tables'])} tables" if result['status'] == 'ok' else result['error']
+    print(f"[{done}/{total}] {result['name']} ({result['target']}): {detail}")
+
+
+def main():
+    # Usage: python batch.py manifest.json [output_dir] [workers]
+    if len(sys.argv) < 2:
+        print("Usage: python batch.py <manifest.json> [output dir] [workers]")
+        return
+
+    jobs = read_manifest(sys.argv[1])
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else 'batch_output'
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    results = run_batch(jobs, output_dir, workers)
+
+    failed = sum(result['status'] != 'ok' for result in results)
+    print(f"{len(results) - failed} of {len(results)} jobs normalized; results in {output_dir}.")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
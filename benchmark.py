@@ -0,0 +1,228 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from closure import shared_cache
+from fd_cover import FDSet
+from mvd import MVDAnalyzer
+from Project1 import (FunctionalDependency, compute_closure, find_bcnf_violations,
+                      find_join_dependencies, validate_mvd)
+from relation import as_relation
+
+# Sizes swept by each stage; --quick uses the first entry of each list only
+SWEEPS = {
+    'compute_closure': [(50, 200), (200, 1000), (1000, 5000)],          # (attributes, FDs)
+    'find_bcnf_violations': [(20, 40), (50, 200), (100, 500)],          # (attributes, FDs)
+    'validate_mvd': [(100, 10, 10), (1000, 10, 10), (10000, 10, 10)],   # (groups, Y per group, Z per group)
+    'find_join_dependencies': [(20, 0.3), (40, 0.3), (80, 0.3)],        # (values per attribute, density)
+    'find_data_driven_mvds': [(1000, 5), (10000, 6), (10000, 8)],       # (rows, columns)
+}
+
+
+def attribute_names(num_attributes):
+    return [f"A{i}" for i in range(num_attributes)]
+
+
+def generate_fds(num_attributes, num_fds, max_lhs=3, seed=0):
+    """Random FDs X -> A whose left sides only use attributes before A, so they can be planted in data."""
+    rng = random.Random(seed)
+    names = attribute_names(num_attributes)
+    fds = []
+    for _ in range(num_fds):
+        rhs = rng.randrange(1, num_attributes)
+        lhs = rng.sample(names[:rhs], rng.randint(1, min(max_lhs, rhs)))
+        fds.append(FunctionalDependency(lhs, [names[rhs]]))
+    return fds
+
+
+def generate_relation(num_rows, num_attributes, fds=(), cardinality=None, seed=0):
+    """Random relation in which the given FDs hold.
+
+    Columns are filled in order; a column that is the right side of an FD is a
+    random function of its left side (only the first FD per column is planted).
+    Returns the DataFrame and the planted FDs.
+    """
+    rng = np.random.default_rng(seed)
+    names = attribute_names(num_attributes)
+    cardinality = cardinality or max(2, int(num_rows ** 0.5))
+    by_rhs = {}
+    for fd in fds:
+        rhs = next(iter(fd.dependents))
+        by_rhs.setdefault(rhs, fd)
+
+    data = {}
+    for name in names:
+        fd = by_rhs.get(name)
+        if fd is None:
+            data[name] = rng.integers(0, cardinality, size=num_rows)
+        else:
+            groups, uniques = pd.factorize(pd.MultiIndex.from_arrays([data[a] for a in sorted(fd.determinants)])
+                                           if len(fd.determinants) > 1 else data[next(iter(fd.determinants))])
+            data[name] = rng.integers(0, cardinality, size=len(uniques))[groups]
+    return pd.DataFrame(data, columns=names), list(by_rhs.values())
+
+
+def generate_mvd_relation(num_groups, y_per_group, z_per_group, seed=0):
+    """Relation over X, Y, Z in which X -->> Y holds: each X group is the product of its Y and Z values."""
+    rng = np.random.default_rng(seed)
+    y_values = rng.integers(0, y_per_group * 4, size=(num_groups, y_per_group))
+    z_values = rng.integers(0, z_per_group * 4, size=(num_groups, z_per_group))
+    x = np.repeat(np.arange(num_groups), y_per_group * z_per_group)
+    y = np.repeat(y_values, z_per_group, axis=1).ravel()
+    z = np.tile(z_values, (1, y_per_group)).ravel()
+    df = pd.DataFrame({'X': x, 'Y': y, 'Z': z}).drop_duplicates(ignore_index=True)
+    return df, FunctionalDependency(['X'], ['Y'], is_multivalued=True)
+
+
+def generate_jd_relation(num_values, density=0.3, seed=0):
+    """Relation over A, B, C satisfying the join dependency *{AB, BC, AC}.
+
+    It is the join of three random binary relations, which always equals the
+    join of its own three projections.
+    """
+    rng = np.random.default_rng(seed)
+
+    def pairs(first, second):
+        mask = rng.random((num_values, num_values)) < density
+        left, right = np.nonzero(mask)
+        return pd.DataFrame({first: left, second: right})
+
+    df = pairs('A', 'B').merge(pairs('B', 'C'), on='B').merge(pairs('A', 'C'), on=['A', 'C'])
+    return df[['A', 'B', 'C']], [{'A', 'B'}, {'B', 'C'}, {'A', 'C'}]
+
+
+def time_call(func, repeat=3, setup=None):
+    """Best wall time of repeat calls, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_compute_closure(num_attributes, num_fds, seed, repeat):
+    fds = generate_fds(num_attributes, num_fds, seed=seed)
+    rng = random.Random(seed)
+    names = attribute_names(num_attributes)
+    queries = [rng.sample(names, rng.randint(1, 4)) for _ in range(200)]
+
+    def run():
+        # The pipeline wraps its FDs in an FDSet, which fingerprints them once for the closure cache
+        fd_set = FDSet(fds)
+        for attributes in queries:
+            compute_closure(attributes, fd_set)
+    return time_call(run, repeat, setup=shared_cache.clear)
+
+
+def bench_find_bcnf_violations(num_attributes, num_fds, seed, repeat):
+    fds = generate_fds(num_attributes, num_fds, seed=seed)
+    table_info = {'name': 'Bench', 'columns': attribute_names(num_attributes), 'primary_keys': ['A0']}
+    return time_call(lambda: find_bcnf_violations(table_info, fds), repeat, setup=shared_cache.clear)
+
+
+def bench_validate_mvd(num_groups, y_per_group, z_per_group, seed, repeat):
+    df, mvd = generate_mvd_relation(num_groups, y_per_group, z_per_group, seed)
+    table_info = {'name': 'Bench', 'columns': ['X', 'Y', 'Z'], 'primary_keys': ['X', 'Y', 'Z']}
+    # Encoding is timed with the check, since the stage encodes a fresh relation per call
+    return time_call(lambda: validate_mvd(table_info, as_relation(df), mvd), repeat)
+
+
+def bench_find_join_dependencies(num_values, density, seed, repeat):
+    df, _ = generate_jd_relation(num_values, density, seed)
+    table_info = {'name': 'Bench', 'columns': ['A', 'B', 'C'], 'primary_keys': ['A', 'B', 'C']}
+    return time_call(lambda: find_join_dependencies(table_info, as_relation(df), workers=1), repeat)
+
+
+def bench_find_data_driven_mvds(num_rows, num_attributes, seed, repeat):
+    fds = generate_fds(num_attributes, num_attributes // 2, max_lhs=2, seed=seed)
+    df, _ = generate_relation(num_rows, num_attributes, fds, cardinality=8, seed=seed)
+    return time_call(lambda: MVDAnalyzer(as_relation(df)).find_data_driven_mvds(), repeat)
+
+
+BENCHMARKS = {
+    'compute_closure': (bench_compute_closure, ('attributes', 'fds')),
+    'find_bcnf_violations': (bench_find_bcnf_violations, ('attributes', 'fds')),
+    'validate_mvd': (bench_validate_mvd, ('groups', 'y_per_group', 'z_per_group')),
+    'find_join_dependencies': (bench_find_join_dependencies, ('values', 'density')),
+    'find_data_driven_mvds': (bench_find_data_driven_mvds, ('rows', 'columns')),
+}
+
+
+def run_benchmarks(stages=None, quick=False, seed=0, repeat=3):
+    """Time every stage across its size sweep; returns a JSON-serializable report."""
+    results = []
+    for stage, (bench, param_names) in BENCHMARKS.items():
+        if stages and stage not in stages:
+            continue
+        sweep = SWEEPS[stage][:1] if quick else SWEEPS[stage]
+        for params in sweep:
+            seconds = bench(*params, seed=seed, repeat=repeat)
+            results.append({'stage': stage, 'params': dict(zip(param_names, params)), 'seconds': seconds})
+            print(f"{stage:<24} {_format_params(results[-1]['params']):<40} {seconds * 1000:10.2f} ms")
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=0.25, min_seconds=0.001):
+    """Results slower than the baseline by more than threshold (a fraction) and min_seconds."""
+    previous = {(r['stage'], _format_params(r['params'])): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['stage'], _format_params(result['params'])))
+        if before is None:
+            continue
+        if result['seconds'] > before * (1 + threshold) and result['seconds'] - before > min_seconds:
+            regressions.append({**result, 'baseline': before, 'ratio': result['seconds'] / before})
+    return regressions
+
+
+def _format_params(params):
+    return ', '.join(f"{name}={value}" for name, value in params.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time normalization stages on seeded synthetic relations.")
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the JSON results")
+    parser.add_argument('--baseline', help="earlier results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="slowdown (fraction) over the baseline reported as a regression")
+    parser.add_argument('--stage', action='append', choices=list(BENCHMARKS), help="run only these stages")
+    parser.add_argument('--quick', action='store_true', help="smallest size of each sweep only")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.stage, args.quick, args.seed, args.repeat)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}.")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} ({_format_params(r['params'])}): "
+                  f"{r['baseline'] * 1000:.2f} ms -> {r['seconds'] * 1000:.2f} ms ({r['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+from collections import OrderedDict, defaultdict
+
+import profiling
+
+
+def fd_pairs(fds):
+    """Yield (determinants, dependents) for every non-multivalued FD."""
+    for fd in fds:
+        if hasattr(fd, 'determinants'):
+            if not fd.is_multivalued:
+                yield fd.determinants, fd.dependents
+        else:
+            yield fd
+
+
+def fd_fingerprint(fds):
+    """Order-independent, hashable identity of an FD set, used as part of cache keys."""
+    cached = getattr(fds, 'fingerprint', None)  # FDSet computes it once
+    if cached is not None:
+        return cached
+    return frozenset((frozenset(det), frozenset(dep)) for det, dep in fd_pairs(fds))
+
+
+class ClosureEngine:
+    """Linear-time attribute closure (Beeri-Bernstein) over bitmask-encoded attributes.
+
+    Accepts FunctionalDependency objects (multivalued ones are ignored) or
+    (determinants, dependents) pairs, as used by Project1.py and dknf.py.
+    """
+
+    def __init__(self, fds):
+        self.bits = {}
+        self.names = []
+        self.lhs_masks = []
+        self.rhs_masks = []
+        self.lhs_sizes = []
+        self.fds_by_attribute = defaultdict(list)
+        self.constant_mask = 0
+        self.constant_fds = []
+
+        for determinants, dependents in fd_pairs(fds):
+            lhs = self.mask(determinants, add=True)
+            rhs = self.mask(dependents, add=True)
+            index = len(self.lhs_masks)
+            self.lhs_masks.append(lhs)
+            self.rhs_masks.append(rhs)
+            self.lhs_sizes.append(len(set(determinants)))
+
+            # An FD with an empty left side holds unconditionally
+            if lhs == 0:
+                self.constant_mask |= rhs
+                self.constant_fds.append(index)
+            for bit in self._bit_positions(lhs):
+                self.fds_by_attribute[bit].append(index)
+
+    def mask(self, attributes, add=False):
+        """Encode attributes as a bitmask; unknown attributes are skipped unless add is set."""
+        mask = 0
+        for attr in attributes:
+            bit = self.bits.get(attr)
+            if bit is None:
+                if not add:
+                    continue
+                bit = len(self.names)
+                self.bits[attr] = bit
+                self.names.append(attr)
+            mask |= 1 << bit
+        return mask
+
+    def attributes(self, mask):
+        """Decode a bitmask back into a set of attribute names."""
+        return {self.names[bit] for bit in self._bit_positions(mask)}
+
+    def closure_mask(self, mask, skip=(), target=0):
+        """Compute the closure of a bitmask in time linear in the size of the FD set.
+
+        skip holds indices of FDs to leave out, so one engine can test FDs for redundancy.
+        With a target mask, the search stops as soon as every target bit is reached
+        (the result is then only part of the closure).
+        """
+        profiling.count('closure')
+        # Remaining unmet left-hand attributes, only for the FDs the search touches
+        counters = {}
+        sizes = self.lhs_sizes
+        result = mask | self.constant_mask
+        if skip and self.constant_fds:
+            result = mask
+            for index in self.constant_fds:
+                if index not in skip:
+                    result |= self.rhs_masks[index]
+        if target and result & target == target:
+            return result
+        worklist = list(self._bit_positions(result))
+
+        while worklist:
+            bit = worklist.pop()
+            for index in self.fds_by_attribute.get(bit, ()):
+                remaining = counters.get(index, sizes[index]) - 1
+                counters[index] = remaining
+                if remaining == 0 and index not in skip:
+                    new_bits = self.rhs_masks[index] & ~result
+                    if new_bits:
+                        result |= new_bits
+                        if target and result & target == target:
+                            return result
+                        worklist.extend(self._bit_positions(new_bits))
+        return result
+
+    def closure(self, attributes):
+        """Compute the closure of a set of attribute names."""
+        attributes = set(attributes)
+        return attributes | self.attributes(self.closure_mask(self.mask(attributes)))
+
+    def is_superkey(self, attributes, all_attributes):
+        """Check whether attributes functionally determine every attribute in all_attributes."""
+        return set(all_attributes).issubset(self.closure(attributes))
+
+    @staticmethod
+    def _bit_positions(mask):
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+
+class ClosureCache:
+    """Bounded LRU cache of closures keyed on (attribute set, FD-set fingerprint).
+
+    Engines are cached per fingerprint as well, so repeated superkey checks
+    against the same FD set skip both engine construction and the closure.
+    """
+
+    def __init__(self, maxsize=4096, max_engines=32):
+        self.maxsize = maxsize
+        self.max_engines = max_engines
+        self.entries = OrderedDict()
+        self.engines = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def engine(self, fds, fingerprint=None):
+        """Return the (cached) ClosureEngine for an FD set."""
+        if fingerprint is None:
+            fingerprint = fd_fingerprint(fds)
+        engine = self.engines.get(fingerprint)
+        if engine is None:
+            engine = ClosureEngine(fingerprint)
+            self.engines[fingerprint] = engine
+            if len(self.engines) > self.max_engines:
+                self.engines.popitem(last=False)
+        else:
+            self.engines.move_to_end(fingerprint)
+        return engine
+
+    def closure(self, attributes, fds, fingerprint=None):
+        """Return the closure of attributes under fds as a frozenset."""
+        if fingerprint is None:
+            fingerprint = fd_fingerprint(fds)
+        key = (frozenset(attributes), fingerprint)
+
+        closure = self.entries.get(key)
+        if closure is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return closure
+
+        self.misses += 1
+        closure = frozenset(self.engine(fds, fingerprint).closure(key[0]))
+        self.entries[key] = closure
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return closure
+
+    def is_superkey(self, attributes, all_attributes, fds, fingerprint=None):
+        """Check whether attributes determine every attribute in all_attributes."""
+        return set(all_attributes).issubset(self.closure(attributes, fds, fingerprint))
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.engines.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Shared by every normalization stage in Project1.py and by dknf.py
+shared_cache = ClosureCache()
@@ -0,0 +1,201 @@
+import numbers
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from flatten_1nf import explode_column
+from relation import as_relation
+
+
+def project_table(relation, table_info):
+    """Distinct rows of the source relation projected onto one final table, as a DataFrame.
+
+    Child tables created by normalize_to_1nf (marked with the column they split)
+    get one atomic value per row, as flatten_1nf.py writes them. Only exact
+    duplicate rows are removed; rows sharing a primary key value are kept (see
+    primary_key_conflicts).
+    """
+    columns = list(table_info["columns"])
+    missing = [col for col in columns if col not in relation.codes]
+    if missing:
+        raise ValueError(f"Table {table_info['name']} has columns not in the data: {', '.join(missing)}")
+
+    rows = relation.distinct_rows(columns)
+    projected = pd.DataFrame({col: relation.values(col, rows) for col in columns}, columns=columns)
+
+    multivalued = table_info.get("multivalued")
+    if multivalued is not None:
+        keys = [col for col in columns if col != multivalued]
+        projected = explode_column(projected.astype({multivalued: object}), keys, multivalued)
+    return projected.reset_index(drop=True)
+
+
+def project_tables(data, tables_info, workers=None):
+    """Project the data onto every table, running the projections in parallel.
+
+    Returns (table_info, rows) pairs in the order of tables_info. The relation's
+    integer codes are shared by all threads; numpy and pandas release the GIL
+    while grouping them.
+    """
+    relation = as_relation(data)
+    if workers == 1 or len(tables_info) < 2:
+        return [(table_info, project_table(relation, table_info)) for table_info in tables_info]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        projections = pool.map(lambda table_info: project_table(relation, table_info), tables_info)
+        return list(zip(tables_info, projections))
+
+
+def sql_literal(value):
+    """Render one value as a SQL literal."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    if isinstance(value, numbers.Real):
+        return repr(float(value))
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def insert_statements(table_name, rows, batch_size=500):
+    """Yield multi-row INSERT statements of at most batch_size rows each."""
+    column_list = ', '.join(rows.columns)
+    values = list(rows.itertuples(index=False, name=None))
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        tuples = ",\n  ".join("(" + ", ".join(sql_literal(v) for v in row) + ")" for row in batch)
+        yield f"INSERT INTO {table_name} ({column_list}) VALUES\n  {tuples};"
+
+
+def primary_key_conflicts(table_info, rows):
+    """Number of rows repeating the primary key of an earlier, different row of a projected table."""
+    primary_keys = list(table_info.get("primary_keys") or [])
+    if not primary_keys or not set(primary_keys).issubset(rows.columns):
+        return 0  # the table is kept unique on all its columns, which the projection already is
+    return int(rows.duplicated(primary_keys).sum())
+
+
+def _conflict_message(table_info, conflicts):
+    return (f"{conflicts} rows of {table_info['name']} repeat a primary key value "
+            f"({', '.join(table_info['primary_keys'])}) of another row")
+
+
+def write_inserts(file, projections, batch_size=500):
+    """Append the INSERT batches for every projected table to an open SQL file; returns row counts.
+
+    Tables whose rows break their primary key are reported (printed and noted
+    in the file), as their INSERTs would fail on a database enforcing it.
+    """
+    counts = {}
+    for table_info, rows in projections:
+        table_name = table_info["name"]
+        conflicts = primary_key_conflicts(table_info, rows)
+        if conflicts:
+            message = _conflict_message(table_info, conflicts)
+            print(f"Warning: {message}.")
+            file.write(f"-- WARNING: {message}; these INSERTs fail on the primary key\n")
+        file.write(f"-- Data for {table_name} ({len(rows)} rows)\n")
+        for statement in insert_statements(table_name, rows, batch_size):
+            file.write(statement + "\n\n")
+        counts[table_name] = len(rows)
+    return counts
+
+
+def sqlite_table_ddl(table_info, columns):
+    """CREATE TABLE statement for loading a final table into SQLite.
+
+    Some decomposed tables keep the key of the table they were split from, which
+    is not among their columns; those rows are kept unique on all columns instead.
+    """
+    column_defs = "".join(f"  {col} VARCHAR(255),\n" for col in columns)
+    primary_keys = list(table_info.get("primary_keys") or [])
+    if primary_keys and set(primary_keys).issubset(columns):
+        column_defs += f"  PRIMARY KEY ({', '.join(primary_keys)})\n"
+    else:
+        column_defs += f"  UNIQUE ({', '.join(columns)})\n"
+    return f"CREATE TABLE IF NOT EXISTS {table_info['name']} (\n{column_defs})"
+
+
+def load_sqlite(data, tables_info, db_path, workers=None):
+    """Create the final tables in a SQLite file and bulk-load their rows in a single transaction.
+
+    Every projected row is inserted. A table whose rows break its primary
+    key, within the data or against rows of an earlier load, raises ValueError
+    naming the table, and nothing is written. Returns the number of rows
+    inserted per table.
+    """
+    projections = project_tables(data, tables_info, workers)
+
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        connection.execute("BEGIN")
+        counts = {}
+        for table_info, rows in projections:
+            table_name = table_info["name"]
+            columns = list(rows.columns)
+            connection.execute(sqlite_table_ddl(table_info, columns))
+
+            conflicts = primary_key_conflicts(table_info, rows)
+            if conflicts:
+                raise ValueError(f"Can not load {table_name}: {_conflict_message(table_info, conflicts)}.")
+
+            placeholders = ', '.join('?' for _ in columns)
+            try:
+                connection.executemany(
+                    f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})",
+                    (tuple(_sqlite_value(v) for v in row) for row in rows.itertuples(index=False, name=None)))
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Can not load {table_name}: {e} (rows from an earlier load?)") from e
+            counts[table_name] = len(rows)
+        connection.execute("COMMIT")
+        return counts
+    except BaseException:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+
+
+def _sqlite_value(value):
+    # sqlite3 only binds Python scalars, not numpy ones
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def main():
+    # Usage: python data_export.py MainData.csv OrderID,FoodID,DrinkID 3NF output.db|Output.sql
+    if len(sys.argv) < 5:
+        print("Usage: python data_export.py <csv file> <primary keys (comma-separated)> <normal form> "
+              "<output .db or .sql file> [FD file]")
+        return
+
+    from Project1 import normalize, parse_fd_file, save_queries_to_file
+    from dataset_cache import load_relation
+
+    relation = load_relation(sys.argv[1])
+    primary_keys = [key.strip() for key in sys.argv[2].split(',')]
+    fds = parse_fd_file(sys.argv[5] if len(sys.argv) > 5 else 'FunctionalDependencies.txt')
+    queries, tables_info = normalize(relation, fds, primary_keys, sys.argv[3])
+
+    output = sys.argv[4]
+    if output.endswith(('.db', '.sqlite', '.sqlite3')):
+        try:
+            counts = load_sqlite(relation, tables_info, output)
+        except ValueError as e:
+            print(f"Error loading {output}: {e}")
+            sys.exit(1)
+    else:
+        counts = save_queries_to_file(queries, output, relation, tables_info)
+    for table_name, count in (counts or {}).items():
+        print(f"{table_name}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
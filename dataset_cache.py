@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from relation import EncodedRelation
+
+CACHE_DIR_NAME = '.normalizer_cache'
+CACHE_FORMAT = 2
+
+
+def file_digest(file_path, block_size=1 << 20):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_digest(file_path, cache_dir):
+    # Re-hash only when size or mtime changed since the last run
+    stat = os.stat(file_path)
+    index_path = os.path.join(cache_dir, 'index.json')
+    try:
+        with open(index_path) as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        index = {}
+
+    source = os.path.abspath(file_path)
+    entry = index.get(source)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['digest'], stat.st_mtime_ns, None
+
+    digest = file_digest(file_path)
+    index[source] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+    _write_atomic(index_path, json.dumps(index, indent=1).encode())
+    # The previous content's entries are stale unless another source still has that content
+    previous = entry['digest'] if entry else None
+    if previous == digest or any(other['digest'] == previous for other in index.values()):
+        previous = None
+    return digest, stat.st_mtime_ns, previous
+
+
+def _evict(cache_dir, digest):
+    # Remove every entry of one source content, whatever read_csv options it was built with
+    for name in os.listdir(cache_dir):
+        if name.startswith(f"{digest}-"):
+            shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+
+
+def _write_atomic(path, payload):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, 'wb') as file:
+        file.write(payload)
+    os.replace(tmp_path, path)
+
+
+def _entry_name(digest, read_csv_kwargs):
+    options = hashlib.sha256(repr(sorted(read_csv_kwargs.items())).encode()).hexdigest()[:12]
+    return f"{digest}-{options}"
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"cannot cache dictionary value of type {type(value).__name__}")
+
+
+def save_relation(relation, entry_dir, source_mtime_ns):
+    """Write codes and dictionaries without pickling, plus inferred types, then publish the entry atomically.
+
+    Typed dictionaries are stored as .npy files; object (text) dictionaries go
+    to dictionaries.json, so loading an entry never runs code from the cache.
+    """
+    parent = os.path.dirname(entry_dir)
+    tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        text_dictionaries = {}
+        for i, col in enumerate(relation.columns):
+            np.save(os.path.join(tmp_dir, f"codes_{i}.npy"), np.ascontiguousarray(relation.codes[col]))
+            dictionary = relation.dictionaries[col]
+            if dictionary.dtype == object:
+                text_dictionaries[str(i)] = dictionary.tolist()
+            else:
+                np.save(os.path.join(tmp_dir, f"dictionary_{i}.npy"), dictionary, allow_pickle=False)
+        with open(os.path.join(tmp_dir, 'dictionaries.json'), 'w') as file:
+            json.dump(text_dictionaries, file, default=_json_value)
+        meta = {
+            'format': CACHE_FORMAT,
+            'columns': relation.columns,
+            'dtypes': [str(relation.dtypes[col]) for col in relation.columns],
+            'rows': relation.num_rows,
+            'source_mtime_ns': source_mtime_ns,
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process published the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def open_relation(entry_dir):
+    """Map a cached entry; code arrays are memory-mapped read-only and shared between processes."""
+    with open(os.path.join(entry_dir, 'meta.json')) as file:
+        meta = json.load(file)
+    if meta.get('format') != CACHE_FORMAT:
+        return None
+    with open(os.path.join(entry_dir, 'dictionaries.json')) as file:
+        text_dictionaries = json.load(file)
+
+    columns = meta['columns']
+    codes, dictionaries = {}, {}
+    dtypes = {col: np.dtype(dtype) for col, dtype in zip(columns, meta['dtypes'])}
+    for i, col in enumerate(columns):
+        codes[col] = np.load(os.path.join(entry_dir, f"codes_{i}.npy"), mmap_mode='r', allow_pickle=False)
+        if str(i) in text_dictionaries:
+            dictionary = np.empty(len(text_dictionaries[str(i)]), dtype=object)
+            dictionary[:] = [np.nan if value is None else value for value in text_dictionaries[str(i)]]
+        else:
+            dictionary = np.load(os.path.join(entry_dir, f"dictionary_{i}.npy"), allow_pickle=False)
+        dictionaries[col] = dictionary
+    return EncodedRelation(columns, codes, dictionaries, dtypes)
+
+
+def load_relation(csv_path, cache_dir=None, use_cache=True, **read_csv_kwargs):
+    """Load a CSV as an EncodedRelation, reusing the on-disk cache when the file is unchanged.
+
+    The cache lives next to the CSV in .normalizer_cache unless cache_dir is given.
+    Entries are keyed by the file's content hash (re-hashed only when its size or
+    mtime changes) and by the read_csv options. Once the file's content changes,
+    the entries built from its old content are removed.
+    """
+    if not use_cache:
+        return EncodedRelation.from_csv(csv_path, **read_csv_kwargs)
+
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR_NAME)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        digest, mtime_ns, previous = _source_digest(csv_path, cache_dir)
+    except OSError:
+        # Read-only location or similar: fall back to parsing
+        return EncodedRelation.from_csv(csv_path, **read_csv_kwargs)
+    if previous is not None:
+        _evict(cache_dir, previous)
+
+    entry_dir = os.path.join(cache_dir, _entry_name(digest, read_csv_kwargs))
+    if os.path.isdir(entry_dir):
+        try:
+            relation = open_relation(entry_dir)
+            if relation is not None:
+                return relation
+        except (OSError, ValueError, KeyError):
+            pass
+        shutil.rmtree(entry_dir, ignore_errors=True)
+
+    relation = EncodedRelation.from_csv(csv_path, **read_csv_kwargs)
+    try:
+        save_relation(relation, entry_dir, mtime_ns)
+    except (OSError, TypeError) as e:
+        print(f"Warning: could not cache '{csv_path}': {e}")
+    return relation
@@ -1,7 +1,11 @@
-import csv
-from typing import Dict, List, Set, Tuple
+import sys
+from typing import Dict, List, Optional, Set, Tuple
 from collections import defaultdict
 
+from closure import fd_fingerprint, shared_cache
+from dataset_cache import load_relation
+from relation import EncodedRelation
+
 class FunctionalDependency:
     def __init__(self, determinants, dependents, is_multivalued=False):
         self.determinants = set(determinants)
@@ -18,19 +22,19 @@ class DKNFNormalizer:
         self.functional_dependencies: List[Tuple[Set[str], Set[str]]] = []
         self.domain_constraints: Dict[str, Set[str]] = {}
         self.key_constraints: List[Set[str]] = []
-        self.data: List[Dict[str, str]] = []
+        self._fd_fingerprint = None  # cache key of functional_dependencies, computed once they are loaded
+        self.data: Optional[EncodedRelation] = None
         self.table_name: str = ""
 
     def load_data_from_csv(self, csv_path: str) -> None:
         """Load data from CSV file and extract attributes."""
         self.table_name = csv_path.split('.')[0].capitalize()
-        with open(csv_path, 'r') as file:
-            csv_reader = csv.DictReader(file)
-            self.data = list(csv_reader)
-            self.attributes.update(csv_reader.fieldnames)
+        self.data = load_relation(csv_path, dtype=str, keep_default_na=False)
+        self.attributes.update(self.data.columns)
 
     def load_constraints_from_file(self, constraints_path: str) -> None:
         """Load constraints from a text file."""
+        self._fd_fingerprint = None
         with open(constraints_path, 'r') as file:
             for line in file:
                 line = line.strip()
@@ -55,20 +59,19 @@ class DKNFNormalizer:
 
     def _compute_closure(self, attributes: Set[str], fds: List[Tuple[Set[str], Set[str]]]) -> Set[str]:
         """Compute the attribute closure under given functional dependencies."""
-        closure = attributes.copy()
-        changed = True
-        while changed:
-            changed = False
-            for det, dep in fds:
-                if det.issubset(closure) and not dep.issubset(closure):
-                    closure.update(dep)
-                    changed = True
-        return closure
+        fingerprint = self._fingerprint() if fds is self.functional_dependencies else None
+        return set(shared_cache.closure(attributes, fds, fingerprint))
 
     def _is_superkey(self, attributes: Set[str], relation_attrs: Set[str]) -> bool:
         """Check if attributes form a superkey for the relation."""
-        closure = self._compute_closure(attributes, self.functional_dependencies)
-        return relation_attrs.issubset(closure)
+        return shared_cache.is_superkey(attributes, relation_attrs, self.functional_dependencies,
+                                        self._fingerprint())
+
+    def _fingerprint(self):
+        """Fingerprint of the loaded FDs, built once instead of on every closure."""
+        if self._fd_fingerprint is None:
+            self._fd_fingerprint = fd_fingerprint(self.functional_dependencies)
+        return self._fd_fingerprint
 
     def _decompose_to_dknf(self) -> List[Dict]:
         """Perform DKNF decomposition."""
@@ -142,10 +145,19 @@ class DKNFNormalizer:
         self.generate_sql_queries(relations)
 
 def main():
+    # Usage: python dknf.py [csv file] [constraints file]
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'Orders.csv'
+    constraints_path = sys.argv[2] if len(sys.argv) > 2 else 'constraints.txt'
+
     # Run the normalization process
     normalizer = DKNFNormalizer()
-    normalizer.load_data_from_csv('Orders.csv')
-    normalizer.load_constraints_from_file('constraints.txt')
+    for path, load in ((csv_path, normalizer.load_data_from_csv),
+                       (constraints_path, normalizer.load_constraints_from_file)):
+        try:
+            load(path)
+        except FileNotFoundError:
+            print(f"Error: File '{path}' not found.")
+            return
     normalizer.normalize()
 
 if __name__ == "__main__":
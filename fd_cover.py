@@ -0,0 +1,185 @@
+from collections import defaultdict
+from functools import cached_property
+
+from closure import ClosureEngine, fd_pairs
+
+
+def minimal_cover(fds):
+    """Minimal cover of an FD set as (determinants, dependent) pairs of (frozenset, attribute).
+
+    Right-hand sides are split into single attributes, extraneous left-hand
+    attributes are removed and redundant FDs dropped, in that order. Every test
+    is one closure on a single ClosureEngine: the redundancy test leaves the FD
+    under test (and those already dropped) out of the closure instead of
+    rebuilding the engine. Multivalued dependencies are ignored.
+    """
+    split = []
+    for determinants, dependents in fd_pairs(fds):
+        determinants = frozenset(determinants)
+        for attr in sorted(set(dependents) - determinants):
+            split.append((determinants, attr))
+    split = list(dict.fromkeys(split))
+
+    # Remove extraneous attributes: B is extraneous in X -> A when A is in (X - B)+
+    engine = ClosureEngine([(determinants, {attr}) for determinants, attr in split])
+    reduced = []
+    for determinants, attr in split:
+        target = engine.mask([attr])
+        mask = engine.mask(determinants)
+        if len(determinants) == 1 and not engine.constant_mask:
+            reduced.append((determinants, attr))
+            continue  # without FDs of the form {} -> A, nothing follows from the empty set
+        for other in sorted(determinants):
+            smaller = mask & ~engine.mask([other])
+            if engine.closure_mask(smaller, target=target) & target:
+                mask = smaller
+        reduced.append((frozenset(engine.attributes(mask)), attr))
+    reduced = list(dict.fromkeys(reduced))
+
+    # Drop redundant FDs: X -> A is redundant when A is in X+ under the others still kept
+    engine = ClosureEngine([(determinants, {attr}) for determinants, attr in reduced])
+    producers = defaultdict(int)
+    for determinants, attr in reduced:
+        producers[attr] += 1
+    dropped = set()
+    for index, (determinants, attr) in enumerate(reduced):
+        if producers[attr] == 1:
+            continue  # the only FD deriving attr can not be redundant
+        dropped.add(index)
+        target = engine.mask([attr])
+        if engine.closure_mask(engine.mask(determinants), skip=dropped, target=target) & target:
+            producers[attr] -= 1
+        else:
+            dropped.discard(index)
+    return [fd for index, fd in enumerate(reduced) if index not in dropped]
+
+
+def canonical_cover(fds):
+    """Minimal cover with FDs sharing a left-hand side merged, as (determinants, dependents) frozenset pairs.
+
+    Left-hand sides keep the order in which they first appear.
+    """
+    grouped = defaultdict(set)
+    for determinants, attr in minimal_cover(fds):
+        grouped[determinants].add(attr)
+    return [(determinants, frozenset(dependents)) for determinants, dependents in grouped.items()]
+
+
+def synthesize_3nf(columns, fds, key):
+    """Bernstein 3NF synthesis of one relation, as a list of (attributes, key) tuples in column order.
+
+    One schema per left-hand side of the canonical cover (X plus everything X
+    determines), schemas contained in another one removed, and a key relation
+    added when no schema holds a key of the whole relation. Every FD of the
+    cover stays inside one schema, so all dependencies are preserved, and the
+    key relation makes the join lossless. key is the table's primary key; when
+    the FDs do not make it a key, the attributes it does not determine are
+    added to the key relation. FDs whose left side leaves the relation are
+    ignored, right sides are cut to the relation.
+    """
+    columns = list(dict.fromkeys(columns))
+    column_set = set(columns)
+    table_fds = []
+    for determinants, dependents in fd_pairs(fds):
+        if set(determinants) <= column_set and set(dependents) & column_set:
+            table_fds.append((set(determinants), set(dependents) & column_set))
+    cover = canonical_cover(table_fds)
+
+    engine = ClosureEngine(cover)
+    engine.mask(columns, add=True)
+    full = engine.mask(columns)
+    schemas = _drop_subsumed([(engine.mask(determinants | dependents), engine.mask(determinants))
+                              for determinants, dependents in cover])
+
+    if not any(engine.closure_mask(mask, target=full) & full == full for mask, _ in schemas):
+        key_mask = engine.mask(key)
+        key_mask |= full & ~engine.closure_mask(key_mask)
+        schemas.append((key_mask, key_mask))
+
+    position = {col: i for i, col in enumerate(columns)}
+
+    def decode(mask):
+        return sorted(engine.attributes(mask), key=position.get)
+    return [(decode(mask), decode(key_mask)) for mask, key_mask in schemas]
+
+
+def _drop_subsumed(schemas):
+    # Largest schemas first; a schema is dropped when a kept one contains it. Only kept schemas holding the
+    # schema's least common attribute can contain it, so each test looks at one short posting list.
+    bits_of = [list(ClosureEngine._bit_positions(mask)) for mask, _ in schemas]
+    kept = []
+    by_bit = defaultdict(list)
+    for i in sorted(range(len(schemas)), key=lambda i: -len(bits_of[i])):
+        mask, bits = schemas[i][0], bits_of[i]
+        rarest = min(bits, key=lambda bit: len(by_bit[bit]))
+        if any(schemas[k][0] & mask == mask for k in by_bit[rarest]):
+            continue
+        kept.append(i)
+        for bit in bits:
+            by_bit[bit].append(i)
+    return [schemas[i] for i in sorted(kept)]
+
+
+class FDIndex:
+    """Indexes an FD list by attribute so a table only looks at the FDs that fit inside its columns.
+
+    applicable(columns) returns, in their original order, the FDs (and MVDs)
+    whose determinants and dependents all lie in columns: the filter every
+    normalization stage applies. Each FD is reached through the index of its
+    attributes, so the cost follows the table's columns rather than the size of
+    the whole FD set. Results are cached per column set.
+    """
+
+    def __init__(self, fds):
+        self.fds = list(fds)
+        self.sizes = []
+        self.by_attribute = defaultdict(list)
+        for index, fd in enumerate(self.fds):
+            attributes = set(fd.determinants) | set(fd.dependents)
+            self.sizes.append(len(attributes))
+            for attr in attributes:
+                self.by_attribute[attr].append(index)
+        self._tables = {}
+
+    def applicable(self, columns):
+        key = frozenset(columns)
+        cached = self._tables.get(key)
+        if cached is not None:
+            return cached
+
+        seen = defaultdict(int)
+        for attr in key:
+            for index in self.by_attribute.get(attr, ()):
+                seen[index] += 1
+        fds = [self.fds[index] for index in sorted(seen) if seen[index] == self.sizes[index]]
+        self._tables[key] = fds
+        return fds
+
+    def involving(self, attribute):
+        """FDs that mention an attribute on either side."""
+        return [self.fds[index] for index in self.by_attribute.get(attribute, ())]
+
+
+class FDSet(list):
+    """A list of FDs that carries its FDIndex, built on first use (do not modify it afterwards).
+
+    Stages that accept a plain list keep working; they call applicable_fds,
+    which uses the index when it is there.
+    """
+
+    @cached_property
+    def index(self):
+        return FDIndex(self)
+
+    @cached_property
+    def fingerprint(self):
+        # Same value as closure.fd_fingerprint, which returns this one instead of recomputing it
+        return frozenset((frozenset(det), frozenset(dep)) for det, dep in fd_pairs(self))
+
+
+def applicable_fds(fds, columns):
+    """FDs whose attributes all lie within columns, using the FDSet index when available."""
+    if isinstance(fds, FDSet):
+        return fds.index.applicable(columns)
+    columns = set(columns)
+    return [fd for fd in fds if fd.determinants.issubset(columns) and fd.dependents.issubset(columns)]
@@ -0,0 +1,159 @@
+import sys
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from relation import EncodedRelation, as_relation, next_level
+
+
+def _g3_rows(partition, codes, cardinality):
+    # Rows of the non-singleton X classes that differ from their class's most frequent A value
+    if not len(partition.rows):
+        return 0
+    pairs, uniques = pd.factorize(partition.labels * cardinality + codes[partition.rows])
+    counts = np.bincount(pairs, minlength=len(uniques))
+    most_frequent = np.zeros(partition.num_classes, dtype=np.int64)
+    np.maximum.at(most_frequent, np.asarray(uniques) // cardinality, counts)
+    return len(partition.rows) - int(most_frequent.sum())
+
+
+def fd_error(data, lhs, rhs):
+    """g3 error of X -> A: the fraction of rows to delete for the FD to hold exactly (one pass over X's partition)."""
+    relation = as_relation(data)
+    if relation.num_rows == 0:
+        return 0.0
+    return _g3_rows(relation.partition(lhs), relation.column_codes(rhs), relation.cardinality(rhs)) / relation.num_rows
+
+
+class FDDiscovery:
+    """Level-wise (TANE) discovery of minimal functional dependencies from data.
+
+    Walks the attribute lattice one level at a time, keeps the stripped partitions
+    of the previous level only, and prunes with TANE's right-hand-side candidate
+    sets C+. X -> A holds exactly when e(X) == e(X + A).
+
+    With sample_size, candidates are first checked on a random sample of the
+    rows: an FD that fails on some rows fails on the table, so only the ones
+    holding on the sample are confirmed on the full data, from partitions built
+    on demand. The lattice walk and pruning then run on the sample's
+    partitions, and the result is the same as without sampling.
+
+    With max_error, approximate FDs are found too: X -> A is kept when its g3
+    error (see fd_error) is at most max_error. Sampling is then not used, as
+    an approximate FD can fail on a sample.
+    """
+
+    def __init__(self, data, columns=None, sample_size=None, seed=0, max_error=0.0):
+        self.relation = as_relation(data)
+        self.columns = list(self.relation.columns) if columns is None else list(columns)
+        self.max_error = max_error
+        self.sample = None
+        if sample_size is not None and sample_size < self.relation.num_rows and not max_error:
+            self.sample = self.relation.sample(sample_size, seed)
+        base = self.sample if self.sample is not None else self.relation
+        self.codes = {col: base.column_codes(col) for col in self.columns}
+        self.cardinality = {col: base.cardinality(col) for col in self.columns}
+
+    def holds(self, lhs, rhs):
+        """Check X -> A exactly on the data (on the sample first, when there is one), or within max_error."""
+        if self.max_error:
+            return fd_error(self.relation, lhs, rhs) <= self.max_error
+        if self.sample is not None and not self._holds_on(self.sample, lhs, rhs):
+            return False
+        return self._holds_on(self.relation, lhs, rhs)
+
+    @staticmethod
+    def _holds_on(relation, lhs, rhs):
+        return relation.partition(lhs).error == relation.partition(set(lhs) | {rhs}).error
+
+    def discover(self, max_lhs=None):
+        """Return the minimal non-trivial FDs as (lhs tuple, rhs) pairs, smallest left sides first."""
+        order = {col: i for i, col in enumerate(self.columns)}
+        all_attrs = frozenset(self.columns)
+        found = []
+
+        cplus = {(): all_attrs}
+        previous = {(): (self.sample if self.sample is not None else self.relation).partition(())}
+        level = [(col,) for col in self.columns]
+
+        while level:
+            partitions = {}
+            for X in level:
+                last = X[-1]
+                partitions[X] = previous[X[:-1]].product(self.codes[last], self.cardinality[last])
+
+            # Compute dependencies: X - A -> A for A in X and C+(X)
+            for X in level:
+                candidates = all_attrs
+                for i in range(len(X)):
+                    subset = X[:i] + X[i + 1:]
+                    candidates = candidates & cplus.get(subset, frozenset())
+                candidates = set(candidates)
+                for i, attr in enumerate(X):
+                    if attr not in candidates:
+                        continue
+                    lhs = X[:i] + X[i + 1:]
+                    if previous[lhs].error == partitions[X].error and (
+                            self.sample is None or self._holds_on(self.relation, lhs, attr)):
+                        found.append((lhs, attr))
+                        candidates.discard(attr)
+                        candidates -= all_attrs - set(X)
+                    elif self.max_error and _g3_rows(previous[lhs], self.codes[attr], self.cardinality[attr]) \
+                            <= self.max_error * self.relation.num_rows:
+                        # Only an exact FD lets TANE drop the attributes outside X as well
+                        found.append((lhs, attr))
+                        candidates.discard(attr)
+                cplus[X] = frozenset(candidates)
+
+            if max_lhs is not None and len(level[0]) > max_lhs:
+                break
+
+            # Prune sets with nothing left to determine, then build the next level from shared prefixes
+            next_level_sets = next_level([X for X in level if cplus[X]], order)
+
+            # Only the previous level's partitions are needed to refine the next one
+            previous = partitions
+            cplus = {X: cplus[X] for X in level}
+            level = next_level_sets
+
+        return found
+
+
+def format_fds(fds):
+    """Render discovered FDs in the FunctionalDependencies.txt format, grouped by left-hand side."""
+    grouped = defaultdict(list)
+    for lhs, rhs in fds:
+        if lhs:  # constant columns have no determinant to write down
+            grouped[lhs].append(rhs)
+    return [f"{', '.join(lhs)} -> {', '.join(rhs)}" for lhs, rhs in grouped.items()]
+
+
+def write_fd_file(fds, file_path):
+    with open(file_path, 'w') as file:
+        for line in format_fds(fds):
+            file.write(line + "\n")
+
+
+def main():
+    # Usage: python fd_discovery.py data.csv [FunctionalDependencies.txt] [max_lhs] [sample size] [max error]
+    if len(sys.argv) < 2:
+        print("Usage: python fd_discovery.py <csv file> [output file] [max lhs size] [sample size] [max g3 error]")
+        return
+
+    relation = EncodedRelation.from_csv(sys.argv[1])
+    max_lhs = int(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3] else None
+    sample_size = int(sys.argv[4]) if len(sys.argv) > 4 and sys.argv[4] else None
+    max_error = float(sys.argv[5]) if len(sys.argv) > 5 else 0.0
+    fds = FDDiscovery(relation, sample_size=sample_size, max_error=max_error).discover(max_lhs)
+
+    if len(sys.argv) > 2 and sys.argv[2]:
+        write_fd_file(fds, sys.argv[2])
+        print(f"{len(fds)} functional dependencies saved to {sys.argv[2]}.")
+    else:
+        for line in format_fds(fds):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import re
+import sqlite3
+import sys
+
+import pandas as pd
+
+# A list literal such as "{Espresso, Oat Milk}"; items are the runs between commas and braces
+LIST_ITEM = re.compile(r'[^,{}]+')
+
+
+def is_multivalued(series):
+    # Same rule normalize_to_1nf uses: a text column with a comma in any value (key columns are skipped)
+    is_text = series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+    return bool(is_text and series.str.contains(',', regex=False).any())
+
+
+def detect_multivalued_columns(csv_path, primary_keys, chunksize=50000):
+    """First streaming pass: which non-key columns hold list values anywhere in the file."""
+    found = []
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str):
+        for col in chunk.columns:
+            if col not in primary_keys and col not in found and is_multivalued(chunk[col]):
+                found.append(col)
+    return found
+
+
+def explode_column(chunk, primary_keys, col):
+    """Child-table rows (primary keys plus one atomic value) for one column of a chunk."""
+    rows = chunk[primary_keys + [col]].copy()
+    rows[col] = rows[col].str.findall(LIST_ITEM)
+    rows = rows.explode(col)
+    rows[col] = rows[col].str.strip()
+    rows = rows[rows[col].notna() & (rows[col] != '')]
+    return rows.drop_duplicates()
+
+
+class CSVChildWriter:
+    """Appends each child table to <output_dir>/<table>.csv."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.started = set()
+
+    def write(self, table_name, rows):
+        path = os.path.join(self.output_dir, f"{table_name}.csv")
+        first = table_name not in self.started
+        rows.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+        self.started.add(table_name)
+        return len(rows)
+
+    def close(self):
+        pass
+
+
+class SQLiteChildWriter:
+    """Inserts each child table into a SQLite database, committing once per chunk."""
+
+    def __init__(self, db_path):
+        self.connection = sqlite3.connect(db_path)
+        self.created = set()
+
+    def write(self, table_name, rows):
+        columns = list(rows.columns)
+        if table_name not in self.created:
+            column_defs = ",\n".join(f"  {col} VARCHAR(255)" for col in columns)
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table_name} (\n{column_defs},\n"
+                                    f"  PRIMARY KEY ({', '.join(columns)})\n)")
+            self.created.add(table_name)
+        placeholders = ', '.join('?' for _ in columns)
+        # Rows repeated across chunks are already present; keep the first copy and count only new rows
+        before = self.connection.total_changes
+        self.connection.executemany(f"INSERT OR IGNORE INTO {table_name} VALUES ({placeholders})",
+                                    rows.itertuples(index=False, name=None))
+        self.connection.commit()
+        return self.connection.total_changes - before
+
+    def close(self):
+        self.connection.close()
+
+
+def stream_1nf(csv_path, primary_keys, output, columns=None, chunksize=50000):
+    """Flatten multivalued columns of a CSV into child tables without loading it whole.
+
+    output is a directory (one CSV per child table) or a .db/.sqlite file. Each
+    child table, named like the ones normalize_to_1nf creates, holds the primary
+    keys plus one atomic value per row. The CSV is read chunk by chunk, so memory
+    stays flat whatever its size. Duplicates are removed within a chunk (and by
+    the primary key in SQLite). Returns the number of rows written to each
+    child table, not counting those SQLite ignored as duplicates.
+    """
+    if columns is None:
+        columns = detect_multivalued_columns(csv_path, primary_keys, chunksize)
+
+    if output.endswith(('.db', '.sqlite', '.sqlite3')):
+        writer = SQLiteChildWriter(output)
+    else:
+        writer = CSVChildWriter(output)
+
+    counts = {f"{col}_Table": 0 for col in columns}
+    try:
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=str):
+            for col in columns:
+                rows = explode_column(chunk, primary_keys, col)
+                if len(rows):
+                    counts[f"{col}_Table"] += writer.write(f"{col}_Table", rows)
+    finally:
+        writer.close()
+    return counts
+
+
+def main():
+    # Usage: python flatten_1nf.py MainData.csv OrderID,FoodID,DrinkID output_dir|output.db
+    if len(sys.argv) < 4:
+        print("Usage: python flatten_1nf.py <csv file> <primary keys (comma-separated)> <output dir or .db file>")
+        return
+
+    primary_keys = [key.strip() for key in sys.argv[2].split(',')]
+    counts = stream_1nf(sys.argv[1], primary_keys, sys.argv[3])
+    for table_name, count in counts.items():
+        print(f"{table_name}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
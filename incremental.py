@@ -0,0 +1,273 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from relation import _dictionary_key, as_relation
+
+
+class IncrementalValidator:
+    """Keeps declared FDs and MVDs checked while rows are appended, without rescanning the table.
+
+    State is kept per determinant value, on integer codes that extend the
+    relation's column dictionaries:
+
+    - X -> Y: a hash map from each X value to its Y value. An appended row
+      breaks the FD when its X is known with another Y. Appends can not repair
+      an FD, so a broken one drops its map and is no longer checked.
+    - X -->> Y (Z the other columns): per X value the Y values, Z values and
+      YZ pairs seen. The MVD holds while |YZ| == |Y| * |Z| in every group, as in
+      mvd_check.MVDStatistics. Rows with a missing X are ignored, as there.
+      An append can break the MVD or complete a group again, so the groups
+      failing the test are tracked.
+
+    append() only touches the groups of the new rows, so its cost follows
+    the batch, not the table. With primary_keys, the key is tracked as the FD
+    key -> every column. Join dependencies (5NF) are searched on the data and
+    are not tracked.
+    """
+
+    def __init__(self, data, dependencies, primary_keys=None):
+        relation = as_relation(data)
+        self.columns = list(relation.columns)
+        self.num_rows = relation.num_rows
+        self.mappings = {col: {_dictionary_key(value): code for code, value in enumerate(relation.dictionaries[col])}
+                         for col in self.columns}
+        self.cardinalities = {col: len(relation.dictionaries[col]) for col in self.columns}
+        self.multivalued = {col for col in self.columns if relation.contains(col, ',')}
+        codes = {col: np.asarray(relation.codes[col], dtype=np.int64) for col in self.columns}
+
+        self.fds = []
+        self.mvds = []
+        for dependency in dependencies:
+            determinants = [col for col in self.columns if col in dependency.determinants]
+            if len(determinants) < len(dependency.determinants):
+                continue  # the left side leaves the relation
+            dependents = [col for col in self.columns
+                          if col in dependency.dependents and col not in dependency.determinants]
+            if not dependents:
+                continue
+            target = self.mvds if dependency.is_multivalued else self.fds
+            target.append((dependency, determinants, dependents))
+
+        self.key_fd = None
+        if primary_keys:
+            key = _PrimaryKey(primary_keys, self.columns)
+            self.key_fd = len(self.fds)
+            self.fds.append((key, [col for col in self.columns if col in key.determinants],
+                             [col for col in self.columns if col not in key.determinants]))
+
+        self.fd_maps = [self._build_fd_map(codes, determinants, dependents)
+                        for _, determinants, dependents in self.fds]
+        self.mvd_groups = []
+        self.mvd_failing = []
+        for _, determinants, dependents in self.mvds:
+            groups, failing = self._build_mvd_groups(codes, determinants, dependents)
+            self.mvd_groups.append(groups)
+            self.mvd_failing.append(failing)
+
+    def _build_fd_map(self, codes, determinants, dependents):
+        # X value -> Y value over the distinct (X, Y) pairs; None once the FD is broken
+        frame = pd.DataFrame({col: codes[col] for col in determinants + dependents}).drop_duplicates()
+        if frame[determinants].duplicated().any():
+            return None
+        return dict(zip(self._keys(frame, determinants), self._keys(frame, dependents)))
+
+    def _build_mvd_groups(self, codes, determinants, dependents):
+        others = [col for col in self.columns if col not in determinants and col not in dependents]
+        frame = pd.DataFrame({col: codes[col] for col in self.columns})
+        frame = frame[~self._missing(frame, determinants)].drop_duplicates(determinants + dependents + others)
+        groups = {}
+        for x, y, z in zip(self._keys(frame, determinants), self._keys(frame, dependents),
+                           self._keys(frame, others)):
+            group = groups.get(x)
+            if group is None:
+                group = groups[x] = (set(), set(), set())
+            group[0].add(y)
+            group[1].add(z)
+            group[2].add((y, z))
+        failing = {x for x, (ys, zs, yzs) in groups.items() if len(yzs) != len(ys) * len(zs)}
+        return groups, failing
+
+    @staticmethod
+    def _keys(frame, columns):
+        return list(zip(*(frame[col].to_numpy() for col in columns))) if columns else [()] * len(frame)
+
+    def _missing(self, frame, columns):
+        # Rows whose value is missing in any of the columns
+        missing = np.zeros(len(frame), dtype=bool)
+        for col in columns:
+            code = self.mappings[col].get(_dictionary_key(None))
+            if code is not None:
+                missing |= frame[col].to_numpy() == code
+        return missing
+
+    def encode(self, rows):
+        """Integer codes of new rows, extending the column dictionaries with unseen values."""
+        missing_columns = [col for col in self.columns if col not in rows.columns]
+        if missing_columns:
+            raise ValueError(f"Appended rows have no column {', '.join(missing_columns)}.")
+        codes = {}
+        new_values = {}
+        for col in self.columns:
+            col_codes, uniques = pd.factorize(rows[col], use_na_sentinel=False)
+            mapping = self.mappings[col]
+            remap = np.empty(len(uniques), dtype=np.int64)
+            for i, value in enumerate(uniques):
+                key = _dictionary_key(value)
+                code = mapping.get(key)
+                if code is None:
+                    code = mapping[key] = self.cardinalities[col]
+                    self.cardinalities[col] += 1
+                    new_values.setdefault(col, []).append(value)
+                remap[i] = code
+            codes[col] = remap[col_codes]
+        return pd.DataFrame(codes, columns=self.columns), new_values
+
+    def append(self, rows):
+        """Ingest appended rows (a DataFrame or EncodedRelation) and report what they changed.
+
+        The report lists the FDs and MVDs the batch broke, the MVDs it made hold
+        again, whether the primary key stopped being unique, the columns that
+        became multivalued, and recompute_from: the lowest normal form whose
+        tables have to be rebuilt (None when no stage up to 4NF is affected).
+        """
+        if not isinstance(rows, pd.DataFrame):
+            rows = as_relation(rows).to_dataframe()
+        frame, new_values = self.encode(rows)
+        report = {
+            'rows': len(frame),
+            'fds_invalidated': [],
+            'mvds_invalidated': [],
+            'mvds_restored': [],
+            'key_violated': False,
+            'new_multivalued': [],
+            'recompute_from': None,
+        }
+
+        for col, values in new_values.items():
+            if col not in self.multivalued and any(isinstance(value, str) and ',' in value for value in values):
+                self.multivalued.add(col)
+                report['new_multivalued'].append(col)
+
+        for i, (fd, determinants, dependents) in enumerate(self.fds):
+            fd_map = self.fd_maps[i]
+            if fd_map is None:
+                continue
+            for x, y in zip(self._keys(frame, determinants), self._keys(frame, dependents)):
+                known = fd_map.setdefault(x, y)
+                if known != y:
+                    self.fd_maps[i] = None
+                    if i == self.key_fd:
+                        report['key_violated'] = True
+                    else:
+                        report['fds_invalidated'].append(fd)
+                    break
+
+        for i, (mvd, determinants, dependents) in enumerate(self.mvds):
+            groups, failing = self.mvd_groups[i], self.mvd_failing[i]
+            held = not failing
+            others = [col for col in self.columns if col not in determinants and col not in dependents]
+            present = frame[~self._missing(frame, determinants)]
+            touched = set()
+            for x, y, z in zip(self._keys(present, determinants), self._keys(present, dependents),
+                               self._keys(present, others)):
+                group = groups.get(x)
+                if group is None:
+                    group = groups[x] = (set(), set(), set())
+                group[0].add(y)
+                group[1].add(z)
+                group[2].add((y, z))
+                touched.add(x)
+            for x in touched:
+                ys, zs, yzs = groups[x]
+                if len(yzs) == len(ys) * len(zs):
+                    failing.discard(x)
+                else:
+                    failing.add(x)
+            if held and failing:
+                report['mvds_invalidated'].append(mvd)
+            elif not held and not failing:
+                report['mvds_restored'].append(mvd)
+
+        self.num_rows += len(frame)
+        if report['key_violated'] or report['new_multivalued']:
+            report['recompute_from'] = '1NF'
+        elif report['fds_invalidated']:
+            report['recompute_from'] = '2NF'
+        elif report['mvds_invalidated'] or report['mvds_restored']:
+            report['recompute_from'] = '4NF'
+        return report
+
+    def holds(self, dependency):
+        """Current status of a tracked FD or MVD (None when it is not tracked)."""
+        for i, (fd, _, _) in enumerate(self.fds):
+            if fd is dependency:
+                return self.fd_maps[i] is not None
+        for i, (mvd, _, _) in enumerate(self.mvds):
+            if mvd is dependency:
+                return not self.mvd_failing[i]
+        return None
+
+    @property
+    def key_holds(self):
+        return self.key_fd is None or self.fd_maps[self.key_fd] is not None
+
+
+class _PrimaryKey:
+    # The primary key as the FD key -> every other column, reported through key_violated
+    is_multivalued = False
+
+    def __init__(self, primary_keys, columns):
+        self.determinants = set(primary_keys)
+        self.dependents = set(columns) - self.determinants
+
+    def __str__(self):
+        return f"{{{','.join(sorted(self.determinants))}}} -> {{{','.join(sorted(self.dependents))}}}"
+
+
+def format_report(report):
+    """Text summary of an IncrementalValidator.append report."""
+    lines = [f"{report['rows']} rows appended."]
+    if report['key_violated']:
+        lines.append("The primary key is no longer unique.")
+    for col in report['new_multivalued']:
+        lines.append(f"Column {col} now holds multivalued entries.")
+    for fd in report['fds_invalidated']:
+        lines.append(f"FD no longer holds: {fd}")
+    for mvd in report['mvds_invalidated']:
+        lines.append(f"MVD no longer holds: {mvd}")
+    for mvd in report['mvds_restored']:
+        lines.append(f"MVD holds again: {mvd}")
+    if report['recompute_from']:
+        lines.append(f"Normalization results from {report['recompute_from']} up have to be recomputed.")
+    else:
+        lines.append("All dependencies still hold; the normalization results up to 4NF stand.")
+    return "\n".join(lines)
+
+
+def main():
+    # Usage: python incremental.py data.csv new_rows.csv [more_rows.csv ...] [--fds FunctionalDependencies.txt] [--keys a,b]
+    args = sys.argv[1:]
+    options = {}
+    for option in ('--fds', '--keys'):
+        if option in args:
+            position = args.index(option)
+            options[option] = args[position + 1]
+            del args[position:position + 2]
+    if len(args) < 2:
+        print("Usage: python incremental.py <csv file> <appended csv file> [...] [--fds FD file] [--keys a,b]")
+        return
+
+    from dataset_cache import load_relation
+    from Project1 import parse_fd_file
+    fds = parse_fd_file(options.get('--fds', 'FunctionalDependencies.txt'))
+    keys = [key.strip() for key in options['--keys'].split(',')] if '--keys' in options else None
+    validator = IncrementalValidator(load_relation(args[0]), fds, keys)
+    for path in args[1:]:
+        print(f"\n-- {path} --")
+        print(format_report(validator.append(pd.read_csv(path))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from lossless import chase_is_lossless
+from relation import as_relation
+
+
+# Outcomes of checking one candidate decomposition
+LOSSY = 0
+IMPLIED = 1
+JOIN_DEPENDENCY = 2
+
+# Per-process state for pool workers, set once by _init_worker
+_worker_codes = None
+_worker_fds = None
+
+
+def _init_worker(codes, fds):
+    global _worker_codes, _worker_fds
+    _worker_codes = EncodedColumns(codes)
+    _worker_fds = fds
+
+
+def _check_batch(batch):
+    return [_check(_worker_codes, _worker_fds, candidate, decomposition) for candidate, decomposition in batch]
+
+
+def _check(codes, fds, candidate, decomposition):
+    if fds and chase_is_lossless(set().union(*decomposition), decomposition, fds):
+        return IMPLIED
+    return codes.three_way_join(*candidate)
+
+
+class EncodedColumns:
+    """Integer-coded columns with memoized dense group codes per attribute subset (bitmask)."""
+
+    def __init__(self, codes, max_groups=4096, chunk_rows=1 << 20):
+        self.columns = list(codes)
+        self.rows = len(next(iter(codes.values()))) if codes else 0
+        self.column_codes = [np.asarray(codes[col], dtype=np.int64) for col in self.columns]
+        self.max_groups = max_groups
+        self.chunk_rows = chunk_rows
+        self.groups = {}
+        self.representatives = {}
+
+    def group(self, mask):
+        """Dense code per row for the attributes in mask, plus the number of distinct values."""
+        cached = self.groups.get(mask)
+        if cached is not None:
+            return cached
+        if mask == 0:
+            result = (np.zeros(self.rows, dtype=np.int64), 1)
+        else:
+            low = mask & -mask
+            column = self.column_codes[low.bit_length() - 1]
+            if mask == low:
+                dense, uniques = pd.factorize(column)
+            else:
+                rest, _ = self.group(mask ^ low)
+                dense, uniques = pd.factorize(rest * (int(column.max()) + 1) + column)
+            result = (dense.astype(np.int64), len(uniques))
+        if len(self.groups) >= self.max_groups:
+            self.groups.clear()
+        self.groups[mask] = result
+        return result
+
+    def representative_rows(self, mask):
+        """Index of one row per distinct tuple of the projection onto mask."""
+        rows = self.representatives.get(mask)
+        if rows is None:
+            codes, count = self.group(mask)
+            rows = np.empty(count, dtype=np.int64)
+            rows[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)  # first occurrence wins
+            if len(self.representatives) >= self.max_groups:
+                self.representatives.clear()
+            self.representatives[mask] = rows
+        return rows
+
+    def pair_join_size(self, d1, d2):
+        """Size of the join of the distinct projections dropping d1 and d2, computed from group sizes."""
+        full = (1 << len(self.columns)) - 1
+        common, common_count = self.group(full & ~d1 & ~d2)
+        left = self.representative_rows(full & ~d1)
+        right = self.representative_rows(full & ~d2)
+        left_counts = np.bincount(common[left], minlength=common_count)
+        right_counts = np.bincount(common[right], minlength=common_count)
+        return int(np.dot(left_counts, right_counts)), common, left, right, right_counts
+
+    def three_way_join(self, d1, d2, d3):
+        """Classify the join of the components dropping d1, d2 and d3 (disjoint bitmasks).
+
+        Returns IMPLIED when two of the components already join back to the relation
+        (the JD follows from an MVD), JOIN_DEPENDENCY when only all three do, and
+        LOSSY otherwise. Any two components cover every column, so pair joins are
+        counted from group sizes alone; the three-way join streams the extra pairs
+        of R1 join R2 in chunks through a membership test on R3, stopping as soon as
+        it outgrows the relation.
+        """
+        full = (1 << len(self.columns)) - 1
+        original = self.group(full)[1]
+        for da, db in ((d1, d3), (d2, d3)):
+            if self.pair_join_size(da, db)[0] == original:
+                return IMPLIED
+        size, common, left, right, right_counts = self.pair_join_size(d1, d2)
+        if size == original:
+            return IMPLIED
+
+        # R3 = core + d1 + d2: key joined tuples on (R1 - d3 part from the left, d1 part from the right)
+        left_key, _ = self.group(full & ~d1 & ~d3)
+        right_key, right_key_count = self.group(d1)
+        r3_keys = np.unique(left_key * right_key_count + right_key)
+
+        left = left[np.argsort(common[left], kind='stable')]
+        right = right[np.argsort(common[right], kind='stable')]
+        right_start = np.concatenate(([0], np.cumsum(right_counts)[:-1]))
+
+        joined = 0
+        repeats = right_counts[common[left]]
+        bounds = np.cumsum(repeats)
+        start = 0
+        while start < len(left):
+            # Take as many left tuples as fit in one chunk of joined pairs
+            limit = (bounds[start - 1] if start else 0) + self.chunk_rows
+            stop = max(start + 1, int(np.searchsorted(bounds, limit, side='right')))
+            chunk, chunk_repeats = left[start:stop], repeats[start:stop]
+            pair_left = np.repeat(chunk, chunk_repeats)
+            offsets = np.arange(len(pair_left)) - np.repeat(np.cumsum(chunk_repeats) - chunk_repeats, chunk_repeats)
+            pair_right = right[right_start[common[pair_left]] + offsets]
+            keys = left_key[pair_left] * right_key_count + right_key[pair_right]
+            joined += int(np.count_nonzero(np.isin(keys, r3_keys, assume_unique=False)))
+            if joined > original:
+                return LOSSY
+            start = stop
+        return JOIN_DEPENDENCY if joined == original else LOSSY
+
+
+class JoinDependencySearch:
+    """Level-wise search for three-component join dependencies of a table.
+
+    A candidate is written as the attributes each component drops: three pairwise
+    disjoint, non-empty sets D1, D2, D3, giving components R_i = columns - D_i.
+    Levels go from coarse (few dropped attributes) to fine. A lossy decomposition
+    stays lossy under refinement, so a candidate is only tested when every
+    coarsening one level up was lossless; everything below a rejected candidate
+    is pruned without being generated. Projections are memoized per attribute
+    subset as dense
+    integer group codes, candidate batches are spread over a process pool, and the search
+    stops once max_candidates or time_limit is reached. With stop_at_first it
+    also stops after the first level that finds a join dependency, which is
+    enough to tell whether the table is in 5NF.
+    """
+
+    def __init__(self, data, columns, fds=None, workers=None, max_candidates=5000,
+                 time_limit=None, batch_size=64, stop_at_first=False):
+        self.columns = sorted(columns)
+        self.fds = list(fds) if fds else []
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.max_candidates = max_candidates
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.stop_at_first = stop_at_first
+        relation = as_relation(data)
+        self.codes = {col: relation.codes[col] for col in self.columns}
+        self.encoded = EncodedColumns(self.codes)
+        self.stats = {'tested': 0, 'pruned': 0, 'levels': 0, 'truncated': False}
+        self._pool = None
+
+    def search(self):
+        """Return the finest join dependencies found, as lists of three attribute sets.
+
+        Decompositions that are lossless only because two components already join
+        back losslessly (an MVD) or because the declared dependencies imply it are
+        explored further but not reported.
+        """
+        n = len(self.columns)
+        if n < 3 or self.encoded.rows == 0:
+            return []  # an empty table satisfies every join dependency, none is worth a decomposition
+
+        started = time.perf_counter()
+        full = (1 << n) - 1
+        max_dropped = n - 2  # every component keeps at least two attributes
+
+        found = {}
+        level = [tuple(sorted(1 << i for i in combo)) for combo in combinations(range(n), 3)]
+
+        try:
+            while level:
+                self.stats['levels'] += 1
+                if self.max_candidates is not None and len(level) > self.max_candidates - self.stats['tested']:
+                    level = level[:self.max_candidates - self.stats['tested']]
+                    self.stats['truncated'] = True
+                results = self._evaluate(level, started)
+
+                accepted = [candidate for candidate, outcome in zip(level, results) if outcome != LOSSY]
+                for candidate, outcome in zip(level, results):
+                    if outcome != JOIN_DEPENDENCY:
+                        continue
+                    found[candidate] = True
+                    # A finer join dependency supersedes its coarsenings
+                    for parent in self._coarsenings(candidate):
+                        if parent in found:
+                            found[parent] = False
+
+                if self.stats['truncated'] or (self.stop_at_first and found):
+                    break
+
+                accepted_set = set(accepted)
+                next_level = set()
+                for candidate in accepted:
+                    used = candidate[0] | candidate[1] | candidate[2]
+                    free = full & ~used
+                    while free:
+                        bit = free & -free
+                        free ^= bit
+                        for i, dropped in enumerate(candidate):
+                            if bin(dropped).count('1') >= max_dropped:
+                                continue
+                            child = list(candidate)
+                            child[i] = dropped | bit
+                            child = tuple(sorted(child))
+                            if child in next_level:
+                                continue
+                            if all(parent in accepted_set for parent in self._coarsenings(child)):
+                                next_level.add(child)
+                            else:
+                                self.stats['pruned'] += 1
+                level = sorted(next_level)
+        finally:
+            if self._pool is not None:
+                # After a timeout, batches already running are left to finish in the background
+                self._pool.shutdown(wait=not self.stats['truncated'], cancel_futures=True)
+                self._pool = None
+
+        return [self._decode(candidate) for candidate, finest in found.items() if finest]
+
+    def _evaluate(self, candidates, started):
+        # One boolean per candidate; shorter than candidates if the time budget ran out
+        work = [(candidate, self._decode(candidate)) for candidate in candidates]
+        batches = [work[i:i + self.batch_size] for i in range(0, len(work), self.batch_size)]
+
+        results = []
+        if self.workers > 1 and len(batches) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self.codes, self.fds))
+            # Results are taken in submission order, so they stay aligned with candidates; once the time
+            # budget is spent the batches not started yet are cancelled
+            futures = [self._pool.submit(_check_batch, batch) for batch in batches]
+            for i, future in enumerate(futures):
+                results.extend(future.result())
+                if self._out_of_time(started):
+                    for pending in futures[i + 1:]:
+                        pending.cancel()
+                    break
+        else:
+            for batch in batches:
+                results.extend(_check(self.encoded, self.fds, candidate, decomposition)
+                               for candidate, decomposition in batch)
+                if self._out_of_time(started):
+                    break
+
+        if len(results) < len(candidates) or self._out_of_time(started):
+            self.stats['truncated'] = True
+        self.stats['tested'] += len(results)
+        return results
+
+    def _out_of_time(self, started):
+        return self.time_limit is not None and time.perf_counter() - started > self.time_limit
+
+    @staticmethod
+    def _coarsenings(candidate):
+        # Candidates one level up: one dropped attribute moved back into its component
+        parents = []
+        for i, dropped in enumerate(candidate):
+            if dropped & (dropped - 1) == 0:
+                continue  # dropping nothing would leave a component equal to the whole table
+            bits = dropped
+            while bits:
+                bit = bits & -bits
+                bits ^= bit
+                parent = list(candidate)
+                parent[i] = dropped ^ bit
+                parents.append(tuple(sorted(parent)))
+        return parents
+
+    def _decode(self, candidate):
+        return [{col for i, col in enumerate(self.columns) if not dropped >> i & 1} for dropped in candidate]
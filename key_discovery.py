@@ -0,0 +1,150 @@
+import sys
+
+from closure import ClosureEngine
+from relation import EncodedRelation, as_relation, next_level
+
+
+class KeyDiscovery:
+    """Level-wise discovery of the minimal unique column combinations (candidate keys) of the data.
+
+    Works like FDDiscovery: the stripped partition of X + A is refined from the
+    partition of X kept from the previous level, and X is unique exactly when
+    its stripped partition is empty. Supersets of a key are never generated
+    (apriori pruning: a candidate is built only if all its subsets one level
+    down were non-unique), so the search stops early on tables with small keys.
+    """
+
+    def __init__(self, data, columns=None, allow_nulls=False):
+        self.relation = as_relation(data)
+        columns = list(self.relation.columns) if columns is None else list(columns)
+        if not allow_nulls:
+            # A primary key column can not hold NULL
+            columns = [col for col in columns if not self.relation.missing_rows([col]).any()]
+        self.columns = columns
+
+    def discover(self, max_size=None):
+        """Return the candidate keys as column tuples, smallest first."""
+        order = {col: i for i, col in enumerate(self.columns)}
+        keys = []
+        if self.relation.num_rows <= 1:
+            # Every single column (or, with no columns, the empty set) identifies the only row
+            return [(col,) for col in self.columns] if self.columns else [()]
+
+        previous = {(): self.relation.partition(())}
+        level = [(col,) for col in self.columns]
+        while level:
+            non_unique = {}
+            for X in level:
+                last = X[-1]
+                partition = previous[X[:-1]].product(self.relation.column_codes(last),
+                                                     self.relation.cardinality(last))
+                if len(partition.rows) == 0:
+                    keys.append(X)
+                else:
+                    non_unique[X] = partition
+
+            if max_size is not None and len(level[0]) >= max_size:
+                break
+
+            previous = non_unique
+            level = next_level(non_unique, order)
+        return keys
+
+    def is_unique(self, columns):
+        """Whether no two rows agree on all the columns."""
+        return len(self.relation.partition(columns).rows) == 0
+
+
+def fd_candidate_keys(attributes, fds, limit=None):
+    """Candidate keys of a relation implied by its FDs (Lucchesi-Osborn).
+
+    Starts from one key and, for every known key K and FD X -> Y, reduces
+    X + (K - Y) to a new key unless it already contains one. The work grows with
+    the number of keys found, not with the number of attribute subsets.
+    Multivalued dependencies and FDs whose left side leaves the relation are
+    ignored. Keys are returned as sorted tuples, smallest first.
+    """
+    attributes = list(dict.fromkeys(attributes))
+    attribute_set = set(attributes)
+    rules = []
+    for fd in fds:
+        determinants, dependents = (fd.determinants, fd.dependents) if hasattr(fd, 'determinants') else fd
+        if getattr(fd, 'is_multivalued', False) or not set(determinants) <= attribute_set:
+            continue
+        dependents = set(dependents) & attribute_set
+        if dependents:
+            rules.append((set(determinants), dependents))
+
+    engine = ClosureEngine(rules)
+    engine.mask(attributes, add=True)
+    full = engine.mask(attributes)
+    position = {attr: i for i, attr in enumerate(attributes)}
+
+    def is_superkey(mask):
+        return engine.closure_mask(mask) & full == full
+
+    def reduce(mask):
+        # Drop attributes one at a time (in column order) while the rest still determines everything
+        for attr in sorted(engine.attributes(mask), key=position.get):
+            smaller = mask & ~engine.mask([attr])
+            if is_superkey(smaller):
+                mask = smaller
+        return mask
+
+    keys = [reduce(full)]
+    i = 0
+    while i < len(keys) and (limit is None or len(keys) < limit):
+        key = keys[i]
+        for determinants, dependents in rules:
+            candidate = engine.mask(determinants) | (key & ~engine.mask(dependents))
+            if any(known & candidate == known for known in keys):
+                continue
+            keys.append(reduce(candidate))
+            if limit is not None and len(keys) >= limit:
+                break
+        i += 1
+
+    decoded = [tuple(sorted(engine.attributes(key), key=position.get)) for key in keys]
+    return sorted(decoded, key=lambda key: (len(key), [position[attr] for attr in key]))
+
+
+def suggest_primary_key(data, fds=None, max_size=None):
+    """Pick a primary key: the smallest FD-implied key that is unique in the data, else the smallest data key.
+
+    FD-implied keys are only used when the FDs that apply to the relation mention
+    every column; otherwise the columns they leave out would all end up in the key.
+    """
+    relation = as_relation(data)
+    discovery = KeyDiscovery(relation)
+    applicable = [fd for fd in fds or [] if not fd.is_multivalued and fd.determinants <= set(relation.columns)]
+    mentioned = set().union(*(fd.determinants | fd.dependents for fd in applicable))
+    if applicable and mentioned >= set(relation.columns):
+        for key in fd_candidate_keys(relation.columns, applicable):
+            if set(key) <= set(discovery.columns) and discovery.is_unique(key):
+                return list(key)
+    keys = discovery.discover(max_size)
+    return list(keys[0]) if keys else None
+
+
+def main():
+    # Usage: python key_discovery.py data.csv [FunctionalDependencies.txt] [max key size]
+    if len(sys.argv) < 2:
+        print("Usage: python key_discovery.py <csv file> [FD file] [max key size]")
+        return
+
+    relation = EncodedRelation.from_csv(sys.argv[1])
+    max_size = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    print("Candidate keys in the data:")
+    for key in KeyDiscovery(relation).discover(max_size):
+        print(f"  {', '.join(key)}")
+
+    if len(sys.argv) > 2:
+        from Project1 import parse_fd_file
+        fds = parse_fd_file(sys.argv[2])
+        print("Candidate keys implied by the functional dependencies:")
+        for key in fd_candidate_keys(relation.columns, fds):
+            print(f"  {', '.join(key)}")
+
+
+if __name__ == "__main__":
+    main()
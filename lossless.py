@@ -0,0 +1,192 @@
+from collections import defaultdict
+from itertools import product
+
+import profiling
+from relation import as_relation
+
+
+def _dependency_rules(attributes, fds):
+    # Restrict declared FDs/MVDs to the attributes of the relation being decomposed.
+    # X -> Y and X -->> Y still hold on a projection as long as X lies inside it.
+    fd_rules = []
+    mvd_rules = []
+    for fd in fds:
+        if not fd.determinants.issubset(attributes):
+            continue
+        dependents = (fd.dependents & attributes) - fd.determinants
+        if not dependents:
+            continue
+        if fd.is_multivalued:
+            mvd_rules.append((sorted(fd.determinants), sorted(dependents)))
+        else:
+            fd_rules.append((sorted(fd.determinants), sorted(dependents)))
+    return fd_rules, mvd_rules
+
+
+def chase_is_lossless(attributes, decomposition, fds, max_rows=10000):
+    """Tableau chase: True when the declared FDs and MVDs guarantee a lossless join.
+
+    False means the dependencies alone do not imply it (or the tableau grew past
+    max_rows); the data may still join losslessly.
+    """
+    profiling.count('lossless_join_chase')
+    attributes = sorted(set(attributes))
+    position = {attr: i for i, attr in enumerate(attributes)}
+    fd_rules, mvd_rules = _dependency_rules(set(attributes), fds)
+
+    # Distinguished symbols are 0, every other cell starts with a unique symbol
+    rows = []
+    symbol = 0
+    for component in decomposition:
+        row = []
+        for attr in attributes:
+            if attr in component:
+                row.append(0)
+            else:
+                symbol += 1
+                row.append(symbol)
+        rows.append(row)
+
+    def has_distinguished_row():
+        return any(not any(row) for row in rows)
+
+    changed = True
+    while changed:
+        if has_distinguished_row():
+            return True
+        changed = False
+
+        # FD rule: rows agreeing on X are made equal on Y
+        for determinants, dependents in fd_rules:
+            det_pos = [position[a] for a in determinants]
+            groups = defaultdict(list)
+            for row in rows:
+                groups[tuple(row[p] for p in det_pos)].append(row)
+            for group in groups.values():
+                if len(group) < 2:
+                    continue
+                for attr in dependents:
+                    p = position[attr]
+                    values = {row[p] for row in group}
+                    if len(values) < 2:
+                        continue
+                    # Symbols never leave their column, so renaming is column-wide
+                    target = min(values)
+                    for row in rows:
+                        if row[p] in values:
+                            row[p] = target
+                    changed = True
+        if changed and has_distinguished_row():
+            return True  # before the MVD rule, which can multiply the tableau
+
+        # MVD rule: rows agreeing on X swap their Y parts, so each X group becomes
+        # the product of its distinct Y parts and its distinct parts outside X and Y
+        seen = {tuple(row) for row in rows}
+        for determinants, dependents in mvd_rules:
+            det_pos = [position[a] for a in determinants]
+            dep_pos = [position[a] for a in dependents]
+            rest_pos = [p for p in range(len(attributes)) if p not in det_pos and p not in dep_pos]
+            groups = defaultdict(lambda: (set(), set()))
+            for row in list(seen):
+                y_parts, rest_parts = groups[tuple(row[p] for p in det_pos)]
+                y_parts.add(tuple(row[p] for p in dep_pos))
+                rest_parts.add(tuple(row[p] for p in rest_pos))
+            for x_part, (y_parts, rest_parts) in groups.items():
+                if len(y_parts) < 2 or len(rest_parts) < 2:
+                    continue  # the group already is the product
+                for y_part, rest_part in product(y_parts, rest_parts):
+                    new_row = [0] * len(attributes)
+                    for positions, values in ((det_pos, x_part), (dep_pos, y_part), (rest_pos, rest_part)):
+                        for p, value in zip(positions, values):
+                            new_row[p] = value
+                    new_row = tuple(new_row)
+                    if new_row not in seen:
+                        if not any(new_row):
+                            return True
+                        seen.add(new_row)
+                        changed = True
+                        if len(seen) > max_rows:
+                            return False
+        rows = [list(row) for row in seen]
+
+    return has_distinguished_row()
+
+
+class EncodedJoin:
+    """Streaming hash-join lossless check over dictionary-encoded columns.
+
+    Projections are deduplicated on integer codes and memoized per attribute
+    subset, so repeated checks over the same table (as in the join dependency
+    search) reuse them.
+    """
+
+    def __init__(self, data=None, attributes=None, codes=None):
+        if codes is None:
+            relation = as_relation(data)
+            attributes = relation.columns if attributes is None else attributes
+            codes = {attr: relation.codes[attr] for attr in attributes}
+        self.codes = codes
+        self.projections = {}
+
+    def projection(self, attributes):
+        """Distinct rows of the projection onto attributes, as a set of code tuples in the given order."""
+        key = tuple(attributes)
+        rows = self.projections.get(key)
+        if rows is None:
+            rows = set(zip(*(self.codes[attr] for attr in attributes)))
+            self.projections[key] = rows
+        return rows
+
+    def is_lossless(self, decomposition):
+        """Join the projections tuple by tuple, stopping once the join outgrows the original relation."""
+        profiling.count('lossless_join_data')
+        decomposition = [sorted(component) for component in decomposition]
+        attributes = sorted(set().union(*decomposition))
+        original_rows = len(self.projection(attributes))
+
+        # Join the projections in an order where each one shares attributes with the join so far: next is the
+        # remaining projection sharing the most (the earliest on ties). For each, index its distinct rows by
+        # the shared attributes.
+        first = self.projection(decomposition[0])
+        bound = list(decomposition[0])
+        remaining = decomposition[1:]
+        steps = []
+        while remaining:
+            bound_set = set(bound)
+            shared = [len(bound_set.intersection(component)) for component in remaining]
+            best = max(range(len(remaining)), key=lambda i: (shared[i], -i))
+            if not shared[best]:  # No remaining projection joins with the rest
+                return False
+            component = remaining.pop(best)
+            common = [attr for attr in component if attr in bound_set]
+            new = [attr for attr in component if attr not in bound_set]
+            index = defaultdict(set)
+            for row in self.projection(common + new):
+                index[row[:len(common)]].add(row[len(common):])
+            steps.append(([bound.index(attr) for attr in common], index))
+            bound.extend(new)
+
+        joined_rows = 0
+
+        def extend(row, step):
+            nonlocal joined_rows
+            if step == len(steps):
+                joined_rows += 1
+                return joined_rows <= original_rows
+            common_pos, index = steps[step]
+            for extra in index.get(tuple(row[p] for p in common_pos), ()):
+                if not extend(row + extra, step + 1):
+                    return False
+            return True
+
+        for row in first:
+            if not extend(row, 0):
+                return False
+        return joined_rows == original_rows
+
+
+def data_is_lossless(decomposition, data):
+    """Check losslessness on the data itself, without materializing any intermediate join."""
+    attributes = list(dict.fromkeys(attr for component in decomposition for attr in component))
+    return EncodedJoin(data, attributes).is_lossless(decomposition)
+
@@ -1,81 +1,267 @@
-import pandas as pd
-from itertools import combinations
+import os
+import sys
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import load_relation
+from fd_discovery import FDDiscovery
+from relation import EncodedRelation, as_relation, distinct_per_group, next_level
+
+# Per-process analyzer for pool workers, set once by _init_worker
+_worker_analyzer = None
+
+
+def _init_worker(columns, codes, dictionaries, dtypes, sample_size, seed, max_error):
+    global _worker_analyzer
+    relation = EncodedRelation(columns, codes, dictionaries, dtypes)
+    _worker_analyzer = MVDAnalyzer(relation, sample_size, seed, max_error, workers=1)
+
+
+def _evaluate_batch(batch):
+    return [_worker_analyzer._evaluate_determinant(determinant_cols, dependent_cols)
+            for determinant_cols, dependent_cols in batch]
+
 
 class MVDAnalyzer:
-    def __init__(self, csv_file):
-        self.df = pd.read_csv(csv_file)
-        self.columns = list(self.df.columns)
-    
+    # An analysis session over one relation: the FDs, MVDs, 4NF and 5NF results are computed on first use and
+    # cached, so the printout and the decompositions building on each other share one MVD search. The cache
+    # is dropped when the data changes: through set_data() or append(), or when the CSV file it was read
+    # from has been modified since (checked on every access).
+
+    def __init__(self, csv_file, sample_size=None, seed=0, max_error=0.1, max_determinant=None, workers=None,
+                 batch_size=16):
+        # A CSV path, or data already in memory (an EncodedRelation or DataFrame)
+        # sample_size checks candidates on a random sample of the rows first; results stay exact
+        # max_error is the largest MVD violation ratio accepted (see mvd_check.MVDStatistics.error), 0 for exact MVDs
+        # max_determinant bounds the determinant size of the MVD search (None for no bound); the search is
+        # exhaustive over determinant sets, so it keeps wide tables with few keys and FDs tractable
+        # workers is the process count for the MVD search (None for all CPUs), batch_size the determinants per task
+        self.sample_size = sample_size
+        self.seed = seed
+        self.max_error = max_error
+        self.max_determinant = max_determinant
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size = batch_size
+        self._pool = None
+        self.set_data(csv_file)
+
+    def set_data(self, data):
+        # Analyze other data (a CSV path, EncodedRelation or DataFrame) from now on; every cached result is dropped
+        self.source = data if isinstance(data, str) else None
+        self._source_stamp = self._stamp()
+        self.relation = load_relation(data) if isinstance(data, str) else as_relation(data)
+        self.columns = list(self.relation.columns)
+        self.fd_discovery = FDDiscovery(self.relation, sample_size=self.sample_size, seed=self.seed)
+        self.sample = self.fd_discovery.sample
+        self._rows_without = {}
+        self.results = {}
+
+    def append(self, rows):
+        # Add rows (a DataFrame or EncodedRelation with the same columns) to the data; results are recomputed
+        # on next use. The session no longer follows the CSV file afterwards.
+        if not isinstance(rows, pd.DataFrame):
+            rows = as_relation(rows).to_dataframe()
+        missing_columns = [col for col in self.columns if col not in rows.columns]
+        if missing_columns:
+            raise ValueError(f"Appended rows have no column {', '.join(missing_columns)}.")
+        self.set_data(pd.concat([self.relation.to_dataframe(), rows[self.columns]], ignore_index=True))
+
+    def _stamp(self):
+        # Size and modification time of the source CSV, None for data given in memory
+        if self.source is None:
+            return None
+        stat = os.stat(self.source)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _result(self, name, compute):
+        # Cached result, reloading the data first when the source CSV has changed. The result goes into the
+        # cache it was started for, so one computed across a reload never lands in the new one.
+        if self.source is not None and self._stamp() != self._source_stamp:
+            self.set_data(self.source)
+        results = self.results
+        if name not in results:
+            results[name] = compute()
+        return results[name]
 
-    
     def get_functional_dependencies(self):
-       
+        return self._result('fds', self._find_functional_dependencies)
+
+    def _find_functional_dependencies(self):
+        # Single-attribute FDs col1 -> col2, checked on cached stripped partitions
         fds = []
         for col1 in self.columns:
             for col2 in self.columns:
-                if col1 != col2:
-                   
-                    groups = self.df.groupby(col1)[col2].nunique()
-                    if all(groups == 1):
-                        fds.append((col1, col2))
+                if col1 != col2 and self.fd_discovery.holds((col1,), col2):
+                    fds.append((col1, col2))
         return fds
+
+    def discover_functional_dependencies(self, max_lhs=None):
+        # Minimal FDs with multi-attribute left-hand sides, as (lhs tuple, rhs) pairs
+        return self.fd_discovery.discover(max_lhs)
     
     def check_mvd_pattern(self, determinant_cols, dependent_col):
+        error = self.mvd_error(determinant_cols, dependent_col)
+        return error is not None and error <= self.max_error
 
-        # Group by determinant columns
-        grouped = self.df.groupby(determinant_cols)
-        
-        # Check each group for MVD pattern
-        valid_groups = 0
-        total_groups = 0
-        
-        for name, group in grouped:
-            total_groups += 1
-            dependent_values = set(group[dependent_col])
-            
-            other_cols = [col for col in self.columns 
-                         if col not in determinant_cols and col != dependent_col]
-            
+    def mvd_error(self, determinant_cols, dependent_col):
+        # Violation ratio of X -->> A, or None when there is nothing to check (no other columns, no groups)
+        return self._mvd_errors(determinant_cols, [dependent_col])[dependent_col]
+
+    def _mvd_errors(self, determinant_cols, dependent_cols):
+        # Violation ratio of X -->> A for each dependent A, from per-group counts of distinct values only.
+        # Within an X group, |Y| is the number of distinct (X, A) combinations, |Z| that of the combinations
+        # of every column but A, and |YZ| that of whole rows, so each count is a bincount of the group codes
+        # over the first row of every distinct combination. The distinct rows without A are shared by all X.
+        x, num_groups = self.relation.group_codes(determinant_cols)
+        missing = self.relation.missing_rows(determinant_cols)
+        present = None
+        if missing.any():
+            # Groups with a missing X are left out, as in mvd_check.MVDStatistics
+            present = np.zeros(num_groups, dtype=bool)
+            present[x[~missing]] = True
+            if not present.any():
+                return {col: None for col in dependent_cols}
+        yz = np.bincount(x[self._distinct_rows(None)], minlength=num_groups)
+        sampled = self._sampled_groups(x, yz, present) if self.sample is not None else None
+
+        errors = {}
+        for col in dependent_cols:
+            other_cols = [other for other in self.columns if other not in determinant_cols and other != col]
             if not other_cols:
+                errors[col] = None
                 continue
-                
-            other_combinations = group[other_cols].drop_duplicates()
-            expected_combinations = len(dependent_values) * len(other_combinations)
-            actual_combinations = len(group)
-            
-            tolerance = 0.9
-            if actual_combinations >= expected_combinations * tolerance:
-                valid_groups += 1
-        
-        group_threshold = 0.8
-        return valid_groups / total_groups >= group_threshold if total_groups > 0 else False
+            if sampled is not None and self._rejected_by_sample(sampled, col, other_cols):
+                errors[col] = None
+                continue
+            y = distinct_per_group(x, num_groups, self.relation.column_codes(col), self.relation.cardinality(col))
+            z = np.bincount(x[self._distinct_rows(col)], minlength=num_groups)
+            group_yz = yz
+            if present is not None:
+                y, z, group_yz = y[present], z[present], yz[present]
+            expected = int(np.dot(y, z))
+            errors[col] = (expected - int(group_yz.sum())) / expected if expected else None
+        return errors
+
+    def _distinct_rows(self, excluded_col):
+        # First row of every distinct combination of all columns but excluded_col (None for all columns)
+        rows = self._rows_without.get(excluded_col)
+        if rows is None:
+            rows = self._rows_without[excluded_col] = self.relation.distinct_rows(
+                [col for col in self.columns if col != excluded_col])
+        return rows
+
+    def _sampled_groups(self, x, yz, present):
+        # X groups of the sample rows, renumbered densely, with the full |YZ| of each of those groups and the
+        # total |YZ| of every group, so the check of each dependent scales with the sample size, not n
+        sample_groups, group_ids = pd.factorize(x[self.sample.sample_rows])
+        group_yz = yz[group_ids]
+        if present is not None:
+            keep = present[group_ids]
+            return sample_groups, len(group_ids), group_yz, keep, int(yz[present].sum())
+        return sample_groups, len(group_ids), group_yz, None, int(yz.sum())
+
+    def _rejected_by_sample(self, sampled, dependent_col, other_cols):
+        # A group's distinct Y and Z values in the sample are a lower bound on those of the full group, and its
+        # distinct YZ pairs are known exactly. A group with fewer YZ pairs than |Y sample| * |Z sample| misses
+        # at least the difference, so with d missing over all groups and YZ pairs in all the violation ratio is
+        # at least d / (YZ + d). Rejecting only when that bound exceeds max_error keeps the result exact.
+        sample_groups, num_groups, group_yz, keep, total_yz = sampled
+        y, num_y = self.sample.group_codes([dependent_col])
+        z, num_z = self.sample.group_codes(other_cols)
+        y_counts = distinct_per_group(sample_groups, num_groups, y, num_y)
+        z_counts = distinct_per_group(sample_groups, num_groups, z, num_z)
+        if keep is not None:
+            y_counts, z_counts, group_yz = y_counts[keep], z_counts[keep], group_yz[keep]
+        missing = int(np.maximum(y_counts * z_counts - group_yz, 0).sum())
+        return missing > 0 and missing / (total_yz + missing) > self.max_error
+
+    def _evaluate_determinant(self, determinant_cols, dependent_cols):
+        # (is_key, {dependent: violation ratio}) for one determinant set; the MVDs of a key are all trivial
+        if self.relation.distinct_count(determinant_cols) == self.relation.num_rows:
+            return True, {}
+        return False, self._mvd_errors(determinant_cols, dependent_cols)
 
     def find_data_driven_mvds(self):
-        #Find MVDs that are supported by actual data patterns.
+        return self._result('mvds', self._find_mvds)
+
+    def _find_mvds(self):
+        # Find MVDs that are supported by actual data patterns.
+        # Level-wise search over determinant sets X, smallest first:
+        # - columns that are the left side of a single-attribute FD never join a determinant
+        # - once X is a key (its values are unique), X and every superset are skipped
+        # - once X -->> A is found, A is not tested again for supersets of X (augmentation implies it)
+        # Level k+1 joins the surviving sets of level k that share all but their last column, and keeps a set
+        # only when all its k-subsets survived. Group codes for X are refined from cached coarser ones.
         valid_mvds = []
         
         fds = self.get_functional_dependencies()
         fd_determinants = set(fd[0] for fd in fds)
-        
-        for det_size in range(1, len(self.columns) - 1):
-            for determinant_cols in combinations(self.columns, det_size):
-                determinant_cols = list(determinant_cols)
-                remaining_cols = [col for col in self.columns if col not in determinant_cols]
-                
-                if any(det in fd_determinants for det in determinant_cols):
-                    continue
-                
-                for dependent_col in remaining_cols:
-                    if self.check_mvd_pattern(determinant_cols, dependent_col):
-                        valid_mvds.append({
-                            'determinant': determinant_cols,
-                            'dependent': dependent_col
-                        })
+        position = {col: i for i, col in enumerate(self.columns)}
+        found = defaultdict(list)  # dependent -> determinant sets already reported for it
+
+        max_size = len(self.columns) - 2
+        if self.max_determinant is not None:
+            max_size = min(max_size, self.max_determinant)
+
+        level = [(col,) for col in self.columns if col not in fd_determinants]
+        det_size = 1
+        try:
+            while level and det_size <= max_size:
+                work = []
+                for determinant_cols in level:
+                    determinant_set = set(determinant_cols)
+                    dependents = [col for col in self.columns if col not in determinant_set
+                                  and not any(known <= determinant_set for known in found[col])]
+                    work.append((list(determinant_cols), dependents))
+
+                survivors = []
+                for (determinant_cols, dependents), (is_key, errors) in zip(work, self._evaluate(work)):
+                    if is_key:
+                        continue
+                    survivors.append(tuple(determinant_cols))
+                    for dependent_col in dependents:
+                        error = errors[dependent_col]
+                        if error is not None and error <= self.max_error:
+                            valid_mvds.append({
+                                'determinant': determinant_cols,
+                                'dependent': dependent_col,
+                                'error': error
+                            })
+                            found[dependent_col].append(set(determinant_cols))
+
+                level = next_level(survivors, position)
+                det_size += 1
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
         
         return valid_mvds
 
+    def _evaluate(self, work):
+        # One (is_key, errors) pair per determinant, on the worker pool when there is more than one batch
+        batches = [work[i:i + self.batch_size] for i in range(0, len(work), self.batch_size)]
+        if self.workers > 1 and len(batches) > 1:
+            if self._pool is None:
+                relation = self.relation
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker,
+                    initargs=(relation.columns, relation.codes, relation.dictionaries, relation.dtypes,
+                              self.sample_size, self.seed, self.max_error))
+            results = []
+            for batch_results in self._pool.map(_evaluate_batch, batches):
+                results.extend(batch_results)
+            return results
+        return [self._evaluate_determinant(determinant_cols, dependents) for determinant_cols, dependents in work]
+
     def perform_4nf_decomposition(self):
+        return self._result('4NF', self._decompose_4nf)
+
+    def _decompose_4nf(self):
         #Perform 4NF decomposition based on discovered MVDs.
         mvds = self.find_data_driven_mvds()
         tables_4nf = []
@@ -109,6 +295,9 @@ class MVDAnalyzer:
         return tables_4nf
 
     def identify_join_dependencies(self):
+        return self._result('join_dependencies', self._find_join_dependencies)
+
+    def _find_join_dependencies(self):
         
         join_deps = []
         tables_4nf = self.perform_4nf_decomposition()
@@ -127,6 +316,9 @@ class MVDAnalyzer:
         return join_deps
 
     def perform_5nf_decomposition(self):
+        return self._result('5NF', self._decompose_5nf)
+
+    def _decompose_5nf(self):
         
         tables_4nf = self.perform_4nf_decomposition()
         join_deps = self.identify_join_dependencies()
@@ -160,7 +352,7 @@ class MVDAnalyzer:
             columns_sql = []
             for col in table['columns']:
                 # Simplified data type inference
-                data_type = self._infer_sql_type(self.df[col])
+                data_type = self._infer_sql_type(col)
                 columns_sql.append(f"{col} {data_type}")
             
             pk_clause = f"PRIMARY KEY ({', '.join(table['primary_key'])})"
@@ -173,9 +365,9 @@ class MVDAnalyzer:
         
         return queries
 
-    def _infer_sql_type(self, series):
+    def _infer_sql_type(self, col):
         
-        dtype = str(series.dtype)
+        dtype = str(self.relation.dtypes[col])
         if 'int' in dtype:
             return 'INTEGER'
         elif 'float' in dtype:
@@ -183,18 +375,23 @@ class MVDAnalyzer:
         elif 'datetime' in dtype:
             return 'TIMESTAMP'
         else:
-            max_length = series.astype(str).str.len().max()
+            max_length = self.relation.max_length(col)
             return f'VARCHAR({max_length})'
 
-def analyze_and_print_normalization(csv_file):
+def analyze_and_print_normalization(csv_file, sample_size=None, max_error=0.1, max_determinant=None):
    
-    analyzer = MVDAnalyzer(csv_file)
+    try:
+        analyzer = MVDAnalyzer(csv_file, sample_size, max_error=max_error, max_determinant=max_determinant)
+    except FileNotFoundError:
+        print(f"Error: File '{csv_file}' not found.")
+        return
     
     print("\nMulti-valued Dependencies:")
     print("=" * 50)
     mvds = analyzer.find_data_driven_mvds()
     for mvd in mvds:
-        print(f"{', '.join(mvd['determinant'])} ->> {mvd['dependent']}")
+        approximate = f"   (violation ratio {mvd['error']:.3f})" if mvd['error'] else ""
+        print(f"{', '.join(mvd['determinant'])} ->> {mvd['dependent']}{approximate}")
     
     print("\n4NF Decomposition:")
     print("=" * 50)
@@ -211,5 +408,15 @@ def analyze_and_print_normalization(csv_file):
         print(f"\n{query}")
 
 if __name__ == "__main__":
-    analyze_and_print_normalization('test.csv')
+    # Usage: python mvd.py [csv file] [sample size] [max violation ratio] [max determinant size]
+    # An empty argument ("") keeps that option's default
+    try:
+        sample_size = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2] else None
+        max_error = float(sys.argv[3]) if len(sys.argv) > 3 and sys.argv[3] else 0.1
+        max_determinant = int(sys.argv[4]) if len(sys.argv) > 4 and sys.argv[4] else None
+    except ValueError:
+        print("Usage: python mvd.py [csv file] [sample size] [max violation ratio, eg 0.1] [max determinant size]")
+        sys.exit(1)
+    analyze_and_print_normalization(sys.argv[1] if len(sys.argv) > 1 else 'test.csv',
+                                    sample_size, max_error, max_determinant)
     
\ No newline at end of file
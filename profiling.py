@@ -0,0 +1,162 @@
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# The active Profiler, or None. Instrumented code only pays for this check when profiling is off.
+_profiler = None
+_NO_SPAN = nullcontext()
+
+
+class Span:
+    """One timed region: wall time, peak traced memory and the counters incremented inside it."""
+
+    def __init__(self, name, parent, depth, start, attributes):
+        self.name = name
+        self.parent = parent
+        self.depth = depth
+        self.start = start
+        self.attributes = attributes
+        self.seconds = 0.0
+        self.peak_memory = 0
+        self.counts = {}
+
+    def to_dict(self, index):
+        return {
+            'index': index,
+            'name': self.name,
+            'parent': self.parent,
+            'depth': self.depth,
+            'start': round(self.start, 6),
+            'seconds': round(self.seconds, 6),
+            'peak_memory': self.peak_memory,
+            'counts': self.counts,
+            'attributes': self.attributes,
+        }
+
+
+class Profiler:
+    """Collects nested spans and named counters for one run.
+
+    Peak memory comes from tracemalloc, which the profiler starts (and stops
+    again) unless it was already tracing. A span's peak includes its children.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.spans = []
+        self.counters = defaultdict(int)
+        self._stack = []
+        self._started = time.perf_counter()
+        self._owns_tracemalloc = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+
+    def stop(self):
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    @contextmanager
+    def span(self, name, **attributes):
+        parent = self._stack[-1] if self._stack else None
+        span = Span(name, parent, len(self._stack), time.perf_counter() - self._started, attributes)
+        index = len(self.spans)
+        self.spans.append(span)
+
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # Fold the peak reached so far into the enclosing span before resetting it for this one
+            if parent is not None:
+                outer = self.spans[parent]
+                outer.peak_memory = max(outer.peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        counters_before = dict(self.counters)
+        started = time.perf_counter()
+
+        self._stack.append(index)
+        try:
+            yield span
+        finally:
+            self._stack.pop()
+            span.seconds = time.perf_counter() - started
+            if tracing:
+                span.peak_memory = max(span.peak_memory, tracemalloc.get_traced_memory()[1])
+                if parent is not None:
+                    outer = self.spans[parent]
+                    outer.peak_memory = max(outer.peak_memory, span.peak_memory)
+            span.counts = {name: value - counters_before.get(name, 0)
+                           for name, value in self.counters.items() if value != counters_before.get(name, 0)}
+
+    def to_dict(self):
+        return {
+            'total_seconds': round(time.perf_counter() - self._started, 6),
+            'counters': dict(self.counters),
+            'spans': [span.to_dict(i) for i, span in enumerate(self.spans)],
+        }
+
+    def write_json(self, file_path):
+        with open(file_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def summary(self):
+        """Text table of the spans in start order, children indented under their parent."""
+        lines = [f"{'Stage':<40} {'Wall (ms)':>12} {'Peak (MB)':>10}  Counts"]
+        for span in self.spans:
+            counts = ', '.join(f"{name}={value}" for name, value in sorted(span.counts.items()))
+            label = '  ' * span.depth + span.name
+            lines.append(f"{label:<40} {span.seconds * 1000:12.2f} {span.peak_memory / 2 ** 20:10.2f}  {counts}")
+        return "\n".join(lines)
+
+
+def enable(trace_memory=True):
+    """Start collecting spans and counters process-wide; returns the Profiler."""
+    global _profiler
+    disable()
+    _profiler = Profiler(trace_memory)
+    _profiler.start()
+    return _profiler
+
+
+def disable():
+    """Stop collecting; returns the Profiler that was active, if any."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+def active():
+    return _profiler
+
+
+@contextmanager
+def profile(trace_memory=True):
+    """Profile the enclosed block: with profile() as profiler: ..."""
+    profiler = enable(trace_memory)
+    try:
+        yield profiler
+    finally:
+        if _profiler is profiler:
+            disable()
+
+
+def span(name, **attributes):
+    """Context manager timing a region; a shared no-op when profiling is disabled."""
+    if _profiler is None:
+        return _NO_SPAN
+    return _profiler.span(name, **attributes)
+
+
+def count(name, n=1):
+    """Add n to a named counter when profiling is enabled."""
+    if _profiler is not None:
+        _profiler.counters[name] += n
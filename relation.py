@@ -0,0 +1,306 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+class _Missing:
+    # Dictionary key standing in for NaN/None, which never compare equal to themselves
+    def __repr__(self):
+        return 'NaN'
+
+
+_MISSING = _Missing()
+
+
+def _dictionary_key(value):
+    return _MISSING if value is None or value != value else value
+
+
+class StrippedPartition:
+    """Equivalence classes of rows agreeing on an attribute set, without singleton classes.
+
+    rows holds the indices of rows that share their value with at least one other
+    row, labels the class of each of those rows.
+    """
+
+    def __init__(self, rows, labels, num_classes):
+        self.rows = rows
+        self.labels = labels
+        self.num_classes = num_classes
+
+    @classmethod
+    def from_codes(cls, codes):
+        labels, uniques = pd.factorize(codes)
+        return cls._stripped(np.arange(len(codes)), labels, len(uniques))
+
+    @classmethod
+    def _stripped(cls, rows, labels, num_classes):
+        counts = np.bincount(labels, minlength=num_classes)
+        keep = counts[labels] > 1
+        labels, uniques = pd.factorize(labels[keep])
+        return cls(rows[keep], labels.astype(np.int64), len(uniques))
+
+    def product(self, codes, cardinality):
+        """Refine this partition by one more attribute, touching only rows still in non-singleton classes."""
+        combined = self.labels * cardinality + codes[self.rows]
+        labels, uniques = pd.factorize(combined)
+        return self._stripped(self.rows, labels, len(uniques))
+
+    @property
+    def error(self):
+        # TANE's e(X) scaled by the row count: rows to delete so X becomes a key
+        return len(self.rows) - self.num_classes
+
+
+class EncodedRelation:
+    """A CSV relation stored column by column as integer codes plus a value dictionary.
+
+    Every column is loaded once; dependency checks, 1NF splitting and type
+    inference work on the codes (or on the much smaller dictionaries) instead of
+    hashing object-dtype strings again in every groupby. Group codes, distinct
+    counts and stripped partitions are cached per attribute set.
+    """
+
+    def __init__(self, columns, codes, dictionaries, dtypes, max_cached=1024):
+        self.columns = list(columns)
+        self.codes = codes
+        self.dictionaries = dictionaries
+        self.dtypes = dtypes
+        self.num_rows = len(codes[self.columns[0]]) if self.columns else 0
+        self.max_cached = max_cached
+        self._groups = {}
+        self._partitions = {}
+
+    @classmethod
+    def from_dataframe(cls, df):
+        codes, dictionaries, dtypes = {}, {}, {}
+        for col in df.columns:
+            col_codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
+            dtypes[col] = _storage_dtype(df[col].dtype)
+            codes[col] = _compact(col_codes)
+            dictionaries[col] = np.asarray(uniques, dtype=dtypes[col])
+        return cls(df.columns, codes, dictionaries, dtypes)
+
+    @classmethod
+    def from_csv(cls, file_path, chunksize=100000, **read_csv_kwargs):
+        """Load a CSV in chunks, merging each chunk's codes into one dictionary per column."""
+        columns = None
+        mappings, values, dtypes, chunks = {}, {}, {}, {}
+
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, **read_csv_kwargs):
+            if columns is None:
+                columns = list(chunk.columns)
+                for col in columns:
+                    mappings[col], values[col], chunks[col] = {}, [], []
+                    dtypes[col] = _storage_dtype(chunk[col].dtype)
+            for col in columns:
+                col_codes, uniques = pd.factorize(chunk[col], use_na_sentinel=False)
+                mapping, col_values = mappings[col], values[col]
+                remap = np.empty(len(uniques), dtype=np.int64)
+                for i, value in enumerate(uniques):
+                    key = _dictionary_key(value)
+                    code = mapping.get(key)
+                    if code is None:
+                        code = len(col_values)
+                        mapping[key] = code
+                        col_values.append(value)
+                    remap[i] = code
+                chunks[col].append(remap[col_codes])
+                dtypes[col] = _merge_dtypes(dtypes[col], _storage_dtype(chunk[col].dtype))
+
+        if columns is None:
+            columns = list(pd.read_csv(file_path, nrows=0, **read_csv_kwargs).columns)
+            return cls(columns, {col: np.empty(0, dtype=np.int32) for col in columns},
+                       {col: np.empty(0, dtype=object) for col in columns},
+                       {col: np.dtype(object) for col in columns})
+
+        codes, dictionaries = {}, {}
+        for col in columns:
+            codes[col] = _compact(np.concatenate(chunks[col]))
+            dictionaries[col] = np.asarray(values[col], dtype=dtypes[col])
+        return cls(columns, codes, dictionaries, dtypes)
+
+    def __len__(self):
+        return self.num_rows
+
+    @property
+    def empty(self):
+        return self.num_rows == 0 or not self.columns
+
+    def cardinality(self, col):
+        return max(len(self.dictionaries[col]), 1)
+
+    def column_codes(self, col):
+        return self.codes[col].astype(np.int64, copy=False)
+
+    def missing_rows(self, columns):
+        """Boolean mask of rows with a missing value in any of the columns."""
+        mask = np.zeros(self.num_rows, dtype=bool)
+        for col in columns:
+            missing = np.flatnonzero(pd.isna(self.dictionaries[col]))
+            if len(missing):
+                mask |= np.isin(self.codes[col], missing)
+        return mask
+
+    def group_codes(self, columns):
+        """Dense code per row for the combination of columns, and the number of distinct combinations."""
+        key = tuple(sorted(columns))
+        cached = self._groups.get(key)
+        if cached is not None:
+            return cached
+        if not key:
+            result = (np.zeros(self.num_rows, dtype=np.int64), 1)
+        elif len(key) == 1:
+            result = (self.column_codes(key[0]), self.cardinality(key[0]))
+        else:
+            rest, _ = self.group_codes(key[:-1])
+            dense, uniques = pd.factorize(rest * self.cardinality(key[-1]) + self.codes[key[-1]])
+            result = (dense.astype(np.int64), len(uniques))
+        self._store(self._groups, key, result)
+        return result
+
+    def distinct_rows(self, columns):
+        """Index of the first row of every distinct combination of the columns, in order of appearance."""
+        if self.num_rows == 0:
+            return np.empty(0, dtype=np.int64)
+        codes, count = self.group_codes(columns)
+        rows = np.empty(count, dtype=np.int64)
+        rows[codes[::-1]] = np.arange(self.num_rows - 1, -1, -1)  # first occurrence wins
+        return np.sort(rows)
+
+    def distinct_count(self, columns):
+        if self.num_rows == 0:
+            return 0
+        return self.group_codes(columns)[1]
+
+    def partition(self, columns):
+        """Stripped partition for the columns, refined from the cached partition of all but one of them."""
+        key = tuple(sorted(columns))
+        cached = self._partitions.get(key)
+        if cached is not None:
+            return cached
+        if not key:
+            partition = StrippedPartition._stripped(np.arange(self.num_rows),
+                                                    np.zeros(self.num_rows, dtype=np.int64), 1)
+        elif len(key) == 1:
+            partition = StrippedPartition.from_codes(self.column_codes(key[0]))
+        else:
+            partition = self.partition(key[:-1]).product(self.column_codes(key[-1]), self.cardinality(key[-1]))
+        self._store(self._partitions, key, partition)
+        return partition
+
+    def sample(self, size, seed=0):
+        """Relation over a uniform random sample of size rows (without replacement), in their original order.
+
+        The sample shares the column dictionaries, so its codes mean the same
+        values as here; sample_rows holds the indices of the chosen rows.
+        """
+        if size >= self.num_rows:
+            rows = np.arange(self.num_rows)
+        else:
+            rows = np.sort(np.random.default_rng(seed).choice(self.num_rows, size, replace=False))
+        sampled = EncodedRelation(self.columns, {col: self.codes[col][rows] for col in self.columns},
+                                  self.dictionaries, self.dtypes, self.max_cached)
+        sampled.sample_rows = rows
+        return sampled
+
+    def _store(self, cache, key, value):
+        if len(cache) >= self.max_cached:
+            cache.clear()
+        cache[key] = value
+
+    def values(self, col, rows=None):
+        """Decoded values of a column (optionally for selected rows)."""
+        codes = self.codes[col] if rows is None else self.codes[col][rows]
+        return self.dictionaries[col][codes]
+
+    def to_dataframe(self, columns=None):
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({col: self.values(col) for col in columns}, columns=columns)
+
+    def is_text(self, col):
+        return self.dtypes[col] == object
+
+    def sql_type(self, col):
+        # Same rule Project1 has always used: strings become VARCHAR, everything else INT
+        return 'VARCHAR(255)' if self.is_text(col) else 'INT'
+
+    def max_length(self, col):
+        """Longest string form of any value, computed on the dictionary rather than every row."""
+        if len(self.dictionaries[col]) == 0:
+            return 0
+        return int(pd.Series(self.dictionaries[col]).astype(str).str.len().max())
+
+    def contains(self, col, substring):
+        """Whether any text value of the column contains substring (checked once per distinct value)."""
+        if not self.is_text(col):
+            return False
+        return bool(pd.Series(self.dictionaries[col], dtype=object).str.contains(substring, regex=False).any())
+
+
+def _compact(codes):
+    # Codes fit in 32 bits unless a column has more than 2**31 distinct values
+    if len(codes) and codes.max() >= np.iinfo(np.int32).max:
+        return codes.astype(np.int64)
+    return codes.astype(np.int32)
+
+
+def _storage_dtype(dtype):
+    # Text columns are kept as object dtype whatever string dtype pandas parsed them into
+    if isinstance(dtype, np.dtype) and dtype != object:
+        return dtype
+    if pd.api.types.is_string_dtype(dtype) or dtype == object:
+        return np.dtype(object)
+    return np.dtype(dtype) if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype) \
+        else np.dtype(object)
+
+
+def _merge_dtypes(first, second):
+    if first == second:
+        return first
+    if first == object or second == object:
+        return np.dtype(object)
+    return np.promote_types(first, second)
+
+
+def distinct_per_group(groups, num_groups, values, num_values):
+    """Number of distinct values per group, from the distinct (group, value) pairs of two code arrays."""
+    num_values = max(num_values, 1)
+    pairs = groups * num_values + values
+    if num_groups * num_values <= max(4 * len(pairs), 1 << 16):
+        # Few enough possible pairs for a presence table, which is one scatter instead of a hash table
+        seen = np.zeros(num_groups * num_values, dtype=bool)
+        seen[pairs] = True
+        return np.count_nonzero(seen.reshape(num_groups, num_values), axis=1)
+    return np.bincount(pd.unique(pairs) // num_values, minlength=num_groups)  # hash-based, no sort
+
+
+def next_level(level, order):
+    """Apriori join of one level of an attribute-set lattice.
+
+    level holds column tuples of one size, each in column order (order maps a
+    column to its position). Sets sharing all but their last column give X + (b, c),
+    kept when every subset one smaller is in level. A level listed in column
+    order gives the next one in column order too.
+    """
+    members = set(level)
+    blocks = defaultdict(list)
+    for columns in level:
+        blocks[columns[:-1]].append(columns[-1])
+    result = []
+    for prefix, tails in blocks.items():
+        tails.sort(key=order.get)
+        for i in range(len(tails)):
+            for j in range(i + 1, len(tails)):
+                candidate = prefix + (tails[i], tails[j])
+                if all(candidate[:k] + candidate[k + 1:] in members for k in range(len(candidate) - 2)):
+                    result.append(candidate)
+    return result
+
+
+def as_relation(data):
+    """Accept either an EncodedRelation or a DataFrame."""
+    if isinstance(data, EncodedRelation):
+        return data
+    return EncodedRelation.from_dataframe(data)
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from lossless import data_is_lossless
+
+# A -> B -> C -> D, so joining AB, BC and CD gives back the table
+CHAIN = pd.DataFrame({'A': [1, 2, 3], 'B': [1, 1, 2], 'C': [5, 5, 6], 'D': [7, 7, 8]})
+
+
+def test_join_order_does_not_matter():
+    assert data_is_lossless([['A', 'B'], ['B', 'C'], ['C', 'D']], CHAIN)
+    # CD shares nothing with AB, but joins once BC is in
+    assert data_is_lossless([['A', 'B'], ['C', 'D'], ['B', 'C']], CHAIN)
+    assert data_is_lossless([['C', 'D'], ['A', 'B'], ['B', 'C']], CHAIN)
+
+
+def test_disconnected_tables_are_not_lossless():
+    assert not data_is_lossless([['A', 'B'], ['C', 'D']], CHAIN)
+
+
+def test_lossy_join():
+    lossy = pd.DataFrame({'A': [1, 2], 'B': [1, 1], 'C': [5, 6]})
+    assert not data_is_lossless([['A', 'B'], ['B', 'C']], lossy)
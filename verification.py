@@ -0,0 +1,117 @@
+import sys
+
+from closure import ClosureEngine, fd_pairs
+from lossless import chase_is_lossless, data_is_lossless
+
+
+def lost_dependencies(tables, fds):
+    """FDs that no longer follow from the FDs enforceable inside the tables, as (determinants, lost) pairs.
+
+    Uses the restricted closure test instead of projecting F+ onto every table:
+    starting from Z = X, each table R adds (Z & R)+ & R to Z until nothing
+    changes, and X -> Y is preserved exactly when Y ends up in Z. Closures are
+    memoized across FDs by their input, and an FD whose attributes all lie in
+    one table is preserved without any closure. FDs whose left side is not
+    covered by the tables are skipped, right sides are cut to the tables.
+    tables is a list of column lists; multivalued dependencies are ignored.
+    """
+    rules = [(set(determinants), set(dependents)) for determinants, dependents in fd_pairs(fds)]
+    engine = ClosureEngine(rules)
+    universe = set().union(*(set(columns) for columns in tables)) if tables else set()
+    table_masks = list(dict.fromkeys(engine.mask(columns) for columns in tables))
+    closures = {}
+
+    def closure(mask):
+        result = closures.get(mask)
+        if result is None:
+            result = closures[mask] = engine.closure_mask(mask)
+        return result
+
+    lost = []
+    for determinants, dependents in rules:
+        dependents = (dependents & universe) - determinants
+        if not determinants <= universe or not dependents:
+            continue
+        z = engine.mask(determinants)
+        target = engine.mask(dependents)
+        if any((z | target) & ~table == 0 for table in table_masks):
+            continue
+
+        seen = [None] * len(table_masks)
+        changed = True
+        while changed and z & target != target:
+            changed = False
+            for i, table in enumerate(table_masks):
+                part = z & table
+                if part == seen[i]:
+                    continue  # Z grew outside this table, so it adds nothing new
+                seen[i] = part
+                new_bits = closure(part) & table & ~z
+                if new_bits:
+                    z |= new_bits
+                    changed = True
+        if z & target != target:
+            lost.append((determinants, engine.attributes(target & ~z)))
+    return lost
+
+
+def verify_decomposition(tables_info, fds, data=None, max_rows=10000):
+    """Check a normalization result for dependency preservation and a lossless join.
+
+    Returns a report dict: "lost_fds" from lost_dependencies, and "lossless"
+    from the tableau chase over the declared FDs and MVDs. When the chase can not
+    show it and data is given, the join is checked on the data instead;
+    "lossless_by" records which check decided ("chase", "data" or None).
+    """
+    tables = [list(table["columns"]) for table in tables_info]
+    attributes = set().union(*(set(columns) for columns in tables)) if tables else set()
+    report = {
+        "tables": len(tables),
+        "lost_fds": lost_dependencies(tables, fds),
+        "lossless": False,
+        "lossless_by": None,
+    }
+    if not tables:
+        return report
+    if len(tables) == 1 or chase_is_lossless(attributes, tables, fds, max_rows):
+        report["lossless"], report["lossless_by"] = True, "chase"
+    elif data is not None and data_is_lossless(tables, data):
+        report["lossless"], report["lossless_by"] = True, "data"
+    return report
+
+
+def format_report(report):
+    """Text summary of a verify_decomposition report."""
+    lines = []
+    if report["lost_fds"]:
+        lines.append(f"Dependencies not preserved ({len(report['lost_fds'])}):")
+        for determinants, dependents in report["lost_fds"]:
+            lines.append(f"  {{{','.join(sorted(determinants))}}} -> {{{','.join(sorted(dependents))}}}")
+    else:
+        lines.append("All functional dependencies are preserved.")
+    if report["lossless_by"] == "chase":
+        lines.append("The join of the tables is lossless (implied by the dependencies).")
+    elif report["lossless_by"] == "data":
+        lines.append("The join of the tables is lossless on the data, but not implied by the dependencies.")
+    else:
+        lines.append("The join of the tables is NOT lossless.")
+    return "\n".join(lines)
+
+
+def main():
+    # Usage: python verification.py data.csv keys NF [FunctionalDependencies.txt]
+    if len(sys.argv) < 4:
+        print("Usage: python verification.py <csv file> <comma-separated keys> <normal form> [FD file]")
+        return
+
+    from dataset_cache import load_relation
+    from Project1 import normalize, parse_fd_file
+    relation = load_relation(sys.argv[1])
+    fds = parse_fd_file(sys.argv[4] if len(sys.argv) > 4 else 'FunctionalDependencies.txt')
+    keys = [key.strip() for key in sys.argv[2].split(',')]
+    _, tables_info = normalize(relation, fds, keys, sys.argv[3])
+    print(format_report(verify_decomposition(tables_info, fds, relation)))
+
+
+if __name__ == "__main__":
+    main()